@@ -0,0 +1,75 @@
+# Angle assignment rules of the wheels, shared by the 'objects' engine (FlavorWheel and
+# PercentageWheel) and the 'columnar' engine (ColumnarTree): each function handles one group
+# of sibling nodes given the angles of their parent, so the engines only differ in how they
+# walk the tree. Angles are fractions of a turn; the span of a node that is not drawn (and
+# neither are its sub_nodes) is None
+
+
+def leaf_weight(weight, label):
+    # Weight of a leaf of a flavor wheel: 1 by default, 0 leaves it out
+    weight = 1 if weight is None else weight
+    if weight < 0:
+        raise ValueError(f"Invalid weight {weight} for node '{label}': weights cannot be negative")
+    return weight
+
+
+def group_total_angle(start_angle, end_angle):
+    total_angle = (end_angle - start_angle) % 1.0
+    if total_angle <= 0:
+        total_angle += 1.0  # Ensure positive total angle
+    return total_angle
+
+
+def leaf_spans(leaf_counts, start_angle, end_angle):
+    # Flavor wheel: (start, end) angles of the siblings, proportional to their (weighted) leaf counts
+    total_angle = group_total_angle(start_angle, end_angle)
+    total_leaves = sum(leaf_counts)
+    spans = []
+    current_angle = start_angle
+    for leaf_count in leaf_counts:
+        if not leaf_count:
+            spans.append(None)  # Zero weight: not drawn, like a 0% node
+            continue
+        angle_span = total_angle * (leaf_count / total_leaves)
+        end = (current_angle + angle_span) % 1.0
+        spans.append((current_angle, end))
+        current_angle = end
+    return spans
+
+
+def resolve_percentages(percentages):
+    # Percentage wheel: the siblings without a percentage (None) share what the others leave
+    total_specified_percentage = sum(percentage for percentage in percentages if percentage and percentage > 0)
+    total_unspecified_nodes = sum(1 for percentage in percentages if percentage is None)
+    if total_specified_percentage > 100:
+        raise ValueError("Total specified percentage exceeds 100%")
+
+    remaining_percentage = 100 - total_specified_percentage
+    unspecified_percentage = remaining_percentage / total_unspecified_nodes if total_unspecified_nodes > 0 else 0
+    return [unspecified_percentage if percentage is None else percentage for percentage in percentages]
+
+
+def percentage_spans(percentages, start_angle, end_angle):
+    # Percentage wheel: (start, end) angles of the siblings, from their resolved percentages.
+    # A 100% node takes the whole group, and is the only one drawn
+    full_index = next((index for index, percentage in enumerate(percentages) if percentage == 100), None)
+    if full_index is not None:
+        spans = [None] * len(percentages)
+        spans[full_index] = (start_angle, end_angle)
+        return spans
+
+    total_angle = group_total_angle(start_angle, end_angle)
+    spans = []
+    current_angle = start_angle
+    for percentage in percentages:
+        if percentage == 0:
+            spans.append(None)
+            continue
+        angle_span = total_angle * (percentage / 100.0)
+        if current_angle + angle_span == 1.0:
+            end = 1.0
+        else:
+            end = (current_angle + angle_span) % 1.0
+        spans.append((current_angle, end))
+        current_angle = end
+    return spans
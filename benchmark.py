@@ -0,0 +1,371 @@
+import argparse
+import glob
+import json
+import logging
+import os
+import platform
+import random
+import string
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import columnar
+import generate
+from generate import Node
+from drawio import DiagramGenerator
+from columnar import ColumnarTree
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Phases timed for each case, in pipeline order
+OBJECT_PHASES = ('json_load', 'create_nodes', 'create_levels', 'assign_angles', 'levels_config',
+                 'process_levels', 'generate_xml', 'write')
+COLUMNAR_PHASES = ('json_load', 'create_tree', 'assign_angles', 'levels_config',
+                   'process_levels', 'generate_xml', 'write')
+
+
+class LegacyNode:
+    # Reference layout of the previous Node class: every JSON key on the instance __dict__,
+    # and the resolved properties kept in a dict
+    def __init__(self, label, **kwargs):
+        self.label = label
+        self.sub_nodes = []
+        self.parent_node = None
+        self.percentage = kwargs.pop('percentage', None)
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+        self.start_angle = None
+        self.end_angle = None
+        self.shape_id = None
+        self.text_id = None
+        self.resolved_properties = {}
+
+
+def _build_nodes(node_class, count, resolved_values):
+    nodes = []
+    for index in range(count):
+        node = node_class(label=f"Node {index}", shape_color=['#FFD700'], percentage=None)
+        node.start_angle = index / count
+        node.end_angle = (index + 1) / count
+        if node_class is Node:
+            node.resolved_properties = generate.ResolvedProperties._make(resolved_values)
+        else:
+            node.resolved_properties = dict(zip(generate.RESOLVED_PROPERTY_NAMES, resolved_values))
+        nodes.append(node)
+    return nodes
+
+
+def node_memory_benchmark(count=100000):
+    """
+    Measure the memory held by `count` nodes (with their resolved properties),
+    for the compact Node class and for the legacy __dict__-based layout.
+    """
+    resolved_values = ('radial', 'centered', 10, '#FFD700', '#000000', 100, 100)
+    results = {'nodes': count}
+    for name, node_class in (('legacy', LegacyNode), ('compact', Node)):
+        tracemalloc.start()
+        nodes = _build_nodes(node_class, count, resolved_values)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[name] = {'bytes': current, 'peak_bytes': peak, 'bytes_per_node': current / count}
+        del nodes
+    results['ratio'] = results['compact']['bytes'] / results['legacy']['bytes']
+    return results
+
+
+# Synthetic wheels
+# ------------------------------------
+
+def synthetic_levels_config(depth, entries=4):
+    """
+    A levels_config of about `entries` entries covering `depth` levels, mixing
+    the int, list, range and open range ('from') forms of 'levels'.
+    """
+    levels_config = [{'levels': 1, 'outer_radius': 100, 'font_size': 12, 'shape_color': ['#a20025']}]
+    level = 2
+    forms = ('int', 'list', 'range')
+    entry_index = 0
+    while level <= depth and len(levels_config) < entries - 1:
+        form = forms[entry_index % len(forms)]
+        entry_index += 1
+        if form == 'int':
+            levels = level
+            level += 1
+        elif form == 'list':
+            levels = [level, level + 1]
+            level += 2
+        else:
+            levels = {'from': level, 'to': level + 2}
+            level += 3
+        levels_config.append({
+            'levels': levels,
+            'outer_radius_increment': 60,
+            'shape_opacity': 80,
+            'text_rotation': 'perpendicular_upright' if entry_index % 2 else 'radial',
+        })
+    levels_config.append({'levels': {'from': level}, 'outer_radius_increment': 80, 'text_placement': 'callout'})
+    return levels_config
+
+
+def synthetic_spec(wheel_type='flavor_wheel', breadth=4, depth=4, levels_config_entries=4,
+                   label_length=10, structures=1, seed=0):
+    """
+    A wheel spec where every node has `breadth` sub_nodes, down to `depth` levels.
+    Percentage wheels give an explicit percentage to every other node.
+    """
+    rng = random.Random(seed)
+
+    def make_label():
+        return ''.join(rng.choice(string.ascii_letters) for _ in range(label_length))
+
+    def make_nodes(level):
+        nodes = []
+        for index in range(breadth):
+            node = {'label': make_label()}
+            if wheel_type == 'percentage_wheel' and index % 2 == 0:
+                node['percentage'] = 100 / (breadth * 2)
+            if level < depth:
+                node['sub_nodes'] = make_nodes(level + 1)
+            nodes.append(node)
+        return nodes
+
+    return {
+        'type': wheel_type,
+        'levels_config': synthetic_levels_config(depth, levels_config_entries),
+        'structures': [{'name': f"Synthetic {index}", 'nodes': make_nodes(1)} for index in range(structures)],
+    }
+
+
+# Phase timing
+# ------------------------------------
+
+def _run_phases(json_path, engine='objects'):
+    # Run the whole pipeline on a spec file, phase by phase. Returns (phase timings, nodes, cells)
+    timings = dict.fromkeys(OBJECT_PHASES if engine == 'objects' else COLUMNAR_PHASES, 0.0)
+    node_count = 0
+    cell_count = 0
+
+    def timed(phase, function, *args):
+        start_time = time.perf_counter()
+        result = function(*args)
+        timings[phase] += time.perf_counter() - start_time
+        return result
+
+    json_data = timed('json_load', generate.load_json_file, json_path)
+    # Build the wheel without structures, then run the phases of _create_wheel_structures one by one
+    wheel = generate.create_wheel({**json_data, 'structures': []}, engine=engine)
+    wheel.structures_list = json_data['structures']
+
+    with tempfile.TemporaryDirectory() as output_folder:
+        for structure in wheel.structures_list:
+            name = structure['name']
+            diagram = DiagramGenerator()
+            if engine == 'objects':
+                nodes = timed('create_nodes', wheel._create_nodes, structure.get('nodes', []))
+                levels = timed('create_levels', wheel._create_levels_from_nodes, nodes)
+                timed('assign_angles', wheel._assign_node_angles, nodes, 0.0, 1.0)
+                timed('levels_config', wheel._get_levels_config, levels)
+                node_count += sum(len(level.nodes) for level in levels)
+
+                def process_levels():
+                    for level in levels:
+                        wheel._process_level(level=level, diagram=diagram)
+            else:
+                tree = timed('create_tree', ColumnarTree.from_nodes_data, structure.get('nodes', []),
+                             generate.RESOLVED_PROPERTY_NAMES)
+                timed('assign_angles', wheel._assign_tree_angles, tree)
+                timed('levels_config', wheel.level_config_resolver.resolve, len(tree.level_ranges))
+                node_count += len(tree)
+
+                def process_levels():
+                    for level_number in range(1, len(tree.level_ranges) + 1):
+                        wheel._process_tree_level(tree, level_number, diagram)
+
+            timed('process_levels', process_levels)
+            xml_content = timed('generate_xml', diagram.generate_xml, name)
+            cell_count += len(diagram.shapes) + len(diagram.text_elements) + len(diagram.edges)
+
+            def write():
+                with open(os.path.join(output_folder, 'output.drawio'), 'w', encoding='utf-8') as file:
+                    file.write(xml_content)
+            timed('write', write)
+
+    return timings, node_count, cell_count
+
+
+def compression_benchmark(json_path, engine='objects'):
+    # Output size and write_drawio time (render + write) of all the structures of a spec,
+    # for each output compression mode
+    wheel = generate.create_wheel(generate.load_json_file(json_path), engine=engine, xml_cache_bytes=0)
+    results = {mode: {'bytes': 0, 'seconds': 0.0} for mode in generate.COMPRESSION_MODES}
+    with tempfile.TemporaryDirectory() as output_folder:
+        for structure in wheel.structures_list:
+            for mode in generate.COMPRESSION_MODES:
+                output_filename = generate.structure_output_filename(output_folder, 'case', structure['name'],
+                                                                     'drawio', mode)
+                start_time = time.perf_counter()
+                wheel.write_drawio(structure['name'], output_filename, compression=mode)
+                results[mode]['seconds'] += time.perf_counter() - start_time
+                results[mode]['bytes'] += os.path.getsize(output_filename)
+    for mode in generate.COMPRESSION_MODES:
+        results[mode]['ratio'] = results[mode]['bytes'] / results['none']['bytes'] if results['none']['bytes'] else None
+    return results
+
+
+def benchmark_case(name, json_path, engine='objects', repeat=3, measure_memory=True, measure_compression=True):
+    """
+    Time every phase of the pipeline on a spec file (best of `repeat` runs), measure the
+    peak traced memory of one extra run, and the size/time tradeoff of the output compression.
+    """
+    best_timings = None
+    for _ in range(repeat):
+        timings, node_count, cell_count = _run_phases(json_path, engine)
+        if best_timings is None:
+            best_timings = timings
+        else:
+            best_timings = {phase: min(best_timings[phase], timings[phase]) for phase in timings}
+
+    result = {
+        'name': name,
+        'engine': engine,
+        'nodes': node_count,
+        'cells': cell_count,
+        'phases': best_timings,
+        'total': sum(best_timings.values()),
+    }
+    if measure_memory:
+        tracemalloc.start()
+        _run_phases(json_path, engine)
+        result['peak_memory'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    if measure_compression:
+        result['compression'] = compression_benchmark(json_path, engine)
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=BENCHMARK_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(synthetic_cases, engines=('objects',), repeat=3, measure_memory=True,
+                   include_examples=True, node_memory_count=100000, measure_compression=True):
+    """
+    Run the fixed cases (the checked-in examples/*.json) and the synthetic cases
+    (dicts of synthetic_spec arguments), for every engine. Returns the results as a dict.
+    """
+    cases = []
+    with tempfile.TemporaryDirectory() as spec_folder:
+        if include_examples:
+            for json_path in sorted(glob.glob(os.path.join(BENCHMARK_DIR, 'examples', '*.json'))):
+                cases.append((f"example:{os.path.basename(json_path)}", json_path))
+        for index, case in enumerate(synthetic_cases):
+            case_name = "synthetic:" + ",".join(f"{key}={value}" for key, value in sorted(case.items()))
+            json_path = os.path.join(spec_folder, f"synthetic_{index}.json")
+            with open(json_path, 'w', encoding='utf-8') as json_file:
+                json.dump(synthetic_spec(**case), json_file)
+            cases.append((case_name, json_path))
+
+        results = [benchmark_case(case_name, json_path, engine, repeat, measure_memory, measure_compression)
+                   for case_name, json_path in cases for engine in engines]
+
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': columnar.np.__version__ if columnar.np is not None else None,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'repeat': repeat,
+        },
+        'cases': results,
+    }
+    if node_memory_count:
+        report['node_memory'] = node_memory_benchmark(node_memory_count)
+    return report
+
+
+def compare_reports(baseline, current):
+    # Ratio current/baseline of the total time and peak memory of the cases found in both
+    baseline_cases = {(case['name'], case['engine']): case for case in baseline['cases']}
+    comparison = []
+    for case in current['cases']:
+        baseline_case = baseline_cases.get((case['name'], case['engine']))
+        if baseline_case is None:
+            continue
+        entry = {
+            'name': case['name'],
+            'engine': case['engine'],
+            'total_ratio': case['total'] / baseline_case['total'] if baseline_case['total'] else None,
+        }
+        if 'peak_memory' in case and baseline_case.get('peak_memory'):
+            entry['peak_memory_ratio'] = case['peak_memory'] / baseline_case['peak_memory']
+        comparison.append(entry)
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks of the wheel generator.")
+    parser.add_argument('--type', required=False, default='both',
+                        choices=['flavor_wheel', 'percentage_wheel', 'both'],
+                        help='Wheel type of the synthetic cases (default: both)')
+    parser.add_argument('--breadth', required=False, type=int, nargs='+', default=[4, 8],
+                        help='Sub-nodes per node of the synthetic cases, one case per value (default: 4 8)')
+    parser.add_argument('--depth', required=False, type=int, default=4,
+                        help='Number of levels of the synthetic cases (default: 4)')
+    parser.add_argument('--levels-config-entries', required=False, type=int, default=4,
+                        help='Number of levels_config entries of the synthetic cases (default: 4)')
+    parser.add_argument('--label-length', required=False, type=int, default=10,
+                        help='Label length of the synthetic cases (default: 10)')
+    parser.add_argument('--structures', required=False, type=int, default=1,
+                        help='Number of structures of the synthetic cases (default: 1)')
+    parser.add_argument('--engine', required=False, nargs='+', default=['objects'], choices=generate.Wheel.ENGINES,
+                        help='Engines to benchmark (default: objects)')
+    parser.add_argument('--repeat', required=False, type=int, default=3,
+                        help='Runs per case, the best time of each phase is kept (default: 3)')
+    parser.add_argument('--no-memory', required=False, action='store_true',
+                        help='Skip the peak memory measurements (traced runs are slower)')
+    parser.add_argument('--no-compression', required=False, action='store_true',
+                        help='Skip the output compression measurements (size and time of each --compress mode)')
+    parser.add_argument('--no-examples', required=False, action='store_true',
+                        help='Skip the examples/*.json fixed cases')
+    parser.add_argument('--nodes', required=False, type=int, default=100000,
+                        help='Number of nodes of the node memory benchmark, 0 to skip it (default: 100000)')
+    parser.add_argument('--output', required=False, default=None,
+                        help='Write the results to this JSON file (default: print them)')
+    parser.add_argument('--compare', required=False, default=None,
+                        help='A previous results JSON file to compare the results with')
+    args = parser.parse_args()
+
+    generate.logger = generate.initialize_logger(logging.WARNING)
+
+    wheel_types = ['flavor_wheel', 'percentage_wheel'] if args.type == 'both' else [args.type]
+    synthetic_cases = [
+        {'wheel_type': wheel_type, 'breadth': breadth, 'depth': args.depth,
+         'levels_config_entries': args.levels_config_entries, 'label_length': args.label_length,
+         'structures': args.structures}
+        for wheel_type in wheel_types for breadth in args.breadth
+    ]
+    report = run_benchmarks(synthetic_cases, args.engine, args.repeat, not args.no_memory,
+                            not args.no_examples, args.nodes, not args.no_compression)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as baseline_file:
+            report['comparison'] = compare_reports(json.load(baseline_file), report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(report, output_file, indent=2)
+        print(f"Benchmark results written to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
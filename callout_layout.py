@@ -0,0 +1,222 @@
+import heapq
+import math
+
+
+class _LevelRings:
+    """
+    Sweep state of the rings of one level. Each ring has a cursor: the angle where its last
+    label ends. A ring can take a label at the angle theta when its cursor plus the half
+    angle of the label is at most theta + max_shift, so as the sweep moves on, a ring becomes
+    usable again once theta reaches its threshold. The usable rings are kept in a heap by
+    ring number and the others in a heap by threshold: a label only looks at the rings it
+    can use instead of scanning them all. Heap entries carry the version of the ring cursor
+    they were computed with, outdated entries are dropped when popped.
+    Sweep angles keep increasing past 360 degrees: the draw order starts at the top of the
+    wheel (270 degrees) and wraps around through 0.
+    """
+    def __init__(self):
+        self.cursors = []
+        self.versions = []
+        self.usable = []     # (ring, version)
+        self.waiting = []    # (threshold, ring, version)
+        self.last_angle = None
+        self.turns = 0.0
+
+    def sweep_angle(self, angle_deg):
+        angle_deg += self.turns
+        if self.last_angle is not None and angle_deg < self.last_angle - 180.0:
+            self.turns += 360.0
+            angle_deg += 360.0
+        self.last_angle = angle_deg
+        return angle_deg
+
+    def cursor(self, ring):
+        return self.cursors[ring] if ring < len(self.cursors) else -math.inf
+
+    def _open(self, ring):
+        while len(self.cursors) <= ring:
+            self.cursors.append(-math.inf)
+            self.versions.append(0)
+
+    def update(self, ring, cursor, threshold):
+        self._open(ring)
+        self.cursors[ring] = cursor
+        self.versions[ring] += 1
+        heapq.heappush(self.waiting, (threshold, ring, self.versions[ring]))
+
+    def wait(self, ring, threshold):
+        self._open(ring)
+        heapq.heappush(self.waiting, (threshold, ring, self.versions[ring]))
+
+    def release(self, theta):
+        # Move the rings whose threshold is reached by the sweep to the usable heap
+        waiting = self.waiting
+        while waiting and waiting[0][0] <= theta:
+            _, ring, version = heapq.heappop(waiting)
+            if version == self.versions[ring]:
+                heapq.heappush(self.usable, (ring, version))
+
+    def candidates(self):
+        # Usable rings by increasing ring number, then new rings. The rings that are not
+        # used must be handed back, with put_back or wait
+        usable = self.usable
+        while usable:
+            ring, version = heapq.heappop(usable)
+            if version == self.versions[ring]:
+                yield ring
+        ring = len(self.cursors)
+        while True:
+            yield ring
+            ring += 1
+
+    def advance(self, ring, cursor):
+        # Move the cursor of a ring being tried past a label found in the way
+        self._open(ring)
+        if cursor > self.cursors[ring]:
+            self.cursors[ring] = cursor
+
+    def put_back(self, rings):
+        for ring in rings:
+            self._open(ring)
+            heapq.heappush(self.usable, (ring, self.versions[ring]))
+
+
+class CalloutLayout:
+    """
+    Placement of the callout labels of a structure, without overlaps.
+    Each label first tries its default position. When that position is taken, the label is
+    swept along its ring, at most max_shift degrees past its mid angle, or moved out ring by
+    ring (rings are one label apart along the radius, plus padding) until it fits. The rings
+    of each level remember where their last label ends (see _LevelRings), and the placed
+    label boxes are kept in a grid of cells the size of a label, giving the label in the way
+    when a position is taken, to sweep past it. Placing a label takes a few heap operations
+    and cell lookups instead of a test against every other label, so laying out n labels
+    stays near-linear.
+    Labels must be placed in increasing mid angle order within a level (the draw order).
+    """
+    DEFAULT_PADDING = 4
+    DEFAULT_MAX_SHIFT = 10.0  # Degrees
+    DEFAULT_MAX_RINGS = 256
+    # Bounds of the sweep along one ring: labels skipped at most, smallest step (degrees)
+    MAX_SWEEP_STEPS = 8
+    MIN_SWEEP_STEP = 0.01
+
+    def __init__(self, center_x, center_y, text_width, text_height, padding=DEFAULT_PADDING,
+                 max_shift=DEFAULT_MAX_SHIFT, max_rings=DEFAULT_MAX_RINGS):
+        self.center_x = center_x
+        self.center_y = center_y
+        self.text_width = text_width
+        self.text_height = text_height
+        self.padding = padding
+        self.max_shift = max_shift
+        self.max_rings = max_rings
+        self.cell_size = max(text_width, text_height) + padding
+        self.grid = {}             # (column, row) -> boxes (x1, y1, x2, y2) overlapping the cell
+        self.level_rings = {}      # level_number -> _LevelRings
+        self.moved = 0             # Labels placed away from their default position
+        self.overlapping = 0       # Labels left overlapping, after max_rings rings
+
+    def _cells(self, x1, y1, x2, y2):
+        cell_size = self.cell_size
+        for column in range(math.floor(x1 / cell_size), math.floor(x2 / cell_size) + 1):
+            for row in range(math.floor(y1 / cell_size), math.floor(y2 / cell_size) + 1):
+                yield column, row
+
+    def _box(self, x_text, y_text):
+        # Label box grown by half the padding on each side, so boxes stay `padding` apart
+        half_padding = self.padding / 2
+        return (x_text - half_padding, y_text - half_padding,
+                x_text + self.text_width + half_padding, y_text + self.text_height + half_padding)
+
+    def _blocker(self, box):
+        # A placed box overlapping the given one, or None
+        x1, y1, x2, y2 = box
+        grid = self.grid
+        for cell in self._cells(x1, y1, x2, y2):
+            for other in grid.get(cell, ()):
+                if x1 < other[2] and other[0] < x2 and y1 < other[3] and other[1] < y2:
+                    return other
+        return None
+
+    def _insert(self, box):
+        grid = self.grid
+        for cell in self._cells(*box):
+            grid.setdefault(cell, []).append(box)
+
+    def _half_arc(self, angle_deg):
+        # Half of the arc covered along a ring by a label centered at angle_deg, in degrees
+        # times the ring radius: divided by the radius, it gives the half angle
+        theta = math.radians(angle_deg)
+        tangential_extent = self.text_width * abs(math.sin(theta)) + self.text_height * abs(math.cos(theta))
+        return math.degrees((tangential_extent + self.padding) / 2)
+
+    def place(self, level_number, mid_angle_deg, x_text, y_text):
+        """
+        Place a callout label whose default top-left corner is (x_text, y_text), on the ring
+        of the given mid angle, and return the top-left corner where it was placed.
+        """
+        center_x_text = x_text + self.text_width / 2
+        center_y_text = y_text + self.text_height / 2
+        base_radius = math.hypot(center_x_text - self.center_x, center_y_text - self.center_y)
+        rings = self.level_rings.get(level_number)
+        if rings is None:
+            rings = self.level_rings[level_number] = _LevelRings()
+        mid_angle_deg = rings.sweep_angle(mid_angle_deg)
+        rings.release(mid_angle_deg)
+
+        box = self._box(x_text, y_text)
+        if self._blocker(box) is None:
+            # Default position: kept as computed, so layouts without overlaps are unchanged
+            self._insert(box)
+            if base_radius:
+                cursor = max(rings.cursor(0), mid_angle_deg + self._half_arc(mid_angle_deg) / base_radius)
+                rings.update(0, cursor, cursor - self.max_shift)
+            return x_text, y_text
+
+        # Radial extent of the label at its mid angle: labels near the horizontal axis are
+        # stacked along their width, the ones near the vertical axis along their height
+        theta = math.radians(mid_angle_deg)
+        ring_step = self.text_width * abs(math.cos(theta)) + self.text_height * abs(math.sin(theta)) + self.padding
+        half_arc = self._half_arc(mid_angle_deg)
+        max_angle_deg = mid_angle_deg + self.max_shift
+        blocked_rings = []  # Usable rings where this label does not fit, still usable for the next ones
+        try:
+            for ring in rings.candidates():
+                if ring >= self.max_rings:
+                    break
+                radius = base_radius + ring * ring_step
+                # Sweep: start right after the last label of the ring (its half angle depends
+                # on where it lands, the one at the mid angle is close enough)
+                angle_deg = max(rings.cursor(ring) + half_arc / radius, mid_angle_deg)
+                for _ in range(self.MAX_SWEEP_STEPS):
+                    if angle_deg > max_angle_deg:
+                        rings.wait(ring, angle_deg - self.max_shift)
+                        break
+                    theta = math.radians(angle_deg)
+                    candidate_x = self.center_x + radius * math.cos(theta) - self.text_width / 2
+                    candidate_y = self.center_y + radius * math.sin(theta) - self.text_height / 2
+                    box = self._box(candidate_x, candidate_y)
+                    blocker = self._blocker(box)
+                    if blocker is None:
+                        self._insert(box)
+                        cursor = angle_deg + self._half_arc(angle_deg) / radius
+                        rings.update(ring, cursor, cursor - self.max_shift)
+                        self.moved += 1
+                        return candidate_x, candidate_y
+                    # Sweep past the label in the way (placed on another ring at this radius,
+                    # or by another level)
+                    blocker_angle_deg = math.degrees(math.atan2((blocker[1] + blocker[3]) / 2 - self.center_y,
+                                                                (blocker[0] + blocker[2]) / 2 - self.center_x))
+                    blocker_angle_deg += 360.0 * round((angle_deg - blocker_angle_deg) / 360.0)
+                    blocker_end = blocker_angle_deg + self._half_arc(blocker_angle_deg) / radius
+                    rings.advance(ring, blocker_end)
+                    angle_deg = max(blocker_end + half_arc / radius, angle_deg + self.MIN_SWEEP_STEP)
+                else:
+                    blocked_rings.append(ring)
+        finally:
+            rings.put_back(blocked_rings)
+
+        # No room within max_rings: keep the default position
+        self._insert(self._box(x_text, y_text))
+        self.overlapping += 1
+        return x_text, y_text
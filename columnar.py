@@ -0,0 +1,207 @@
+import math
+from array import array
+
+import angle_rules
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, the pure-Python path gives the same results
+    np = None
+
+
+NAN = float('nan')
+
+
+class ColumnarTree:
+    """
+    Flattened wheel structure: one entry per node in parallel arrays, in breadth-first order.
+    Breadth-first order keeps every level in a contiguous index range and the sub_nodes of a
+    node in a contiguous range too (first_child, first_child + child_count), so the angle
+    and geometry passes are flat loops instead of recursions over Node objects.
+    Unassigned angles are NaN.
+    """
+    # Below this number of nodes in a level, the pure-Python geometry is faster than NumPy
+    NUMPY_MIN_BATCH = 64
+
+    def __init__(self):
+        self.labels = []
+        self.node_styles = []            # Own style properties of each node (tuple), or None
+        self.percentages = []            # Given percentage of each node, or None
+        self.weights = []                # Given weight of each node, or None
+        self.parents = array('l')        # Index of the parent node, -1 for the root nodes
+        self.depths = array('l')         # 0 for the root nodes (level 1)
+        self.first_child = array('l')
+        self.child_count = array('l')
+        self.leaf_counts = array('d')
+        self.start_angles = array('d')
+        self.end_angles = array('d')
+        self.level_ranges = []           # (first index, end index) of each level
+        self.root_count = 0
+        self.resolved_properties = []
+
+    @classmethod
+    def from_nodes_data(cls, nodes_data, property_names):
+        tree = cls()
+        tree.root_count = len(nodes_data)
+        pending = [(node_data, -1, 0) for node_data in nodes_data]
+        index = 0
+        while index < len(pending):
+            node_data, parent_index, depth = pending[index]
+            sub_nodes_data = node_data.get('sub_nodes') or ()
+
+            tree.labels.append(node_data['label'])
+            style = tuple(node_data.get(prop) for prop in property_names)
+            tree.node_styles.append(style if any(value is not None for value in style) else None)
+            tree.percentages.append(node_data.get('percentage'))
+            tree.weights.append(node_data.get('weight'))
+            tree.parents.append(parent_index)
+            tree.depths.append(depth)
+            tree.first_child.append(len(pending))
+            tree.child_count.append(len(sub_nodes_data))
+
+            if depth == len(tree.level_ranges):
+                tree.level_ranges.append([index, index])
+            tree.level_ranges[depth][1] = index + 1
+
+            pending.extend((sub_node_data, index, depth + 1) for sub_node_data in sub_nodes_data)
+            pending[index] = None  # Release the raw JSON of the node
+            index += 1
+
+        node_count = len(tree.labels)
+        tree.leaf_counts = array('d', bytes(8 * node_count))
+        tree.start_angles = array('d', [NAN]) * node_count
+        tree.end_angles = array('d', [NAN]) * node_count
+        tree.resolved_properties = [None] * node_count
+        tree.level_ranges = [tuple(level_range) for level_range in tree.level_ranges]
+        return tree
+
+    def __len__(self):
+        return len(self.labels)
+
+    def _drawn_sibling_groups(self, start_angle, end_angle):
+        # (first index, end index, start angle, end angle) of each group of sibling nodes whose
+        # parent is drawn, parents first: the angles of a group are read once its parent's are assigned
+        yield 0, self.root_count, start_angle, end_angle
+        start_angles = self.start_angles
+        end_angles = self.end_angles
+        for index in range(len(self.labels)):
+            if self.child_count[index] and not math.isnan(start_angles[index]) and not math.isnan(end_angles[index]):
+                first_child = self.first_child[index]
+                yield first_child, first_child + self.child_count[index], start_angles[index], end_angles[index]
+
+    def _assign_spans(self, first_index, spans):
+        start_angles = self.start_angles
+        end_angles = self.end_angles
+        for index, span in enumerate(spans, first_index):
+            if span is not None:
+                start_angles[index], end_angles[index] = span
+
+    # Angle assignment
+    # ------------------------------------
+
+    def assign_leaf_angles(self, start_angle=0.0, end_angle=1.0):
+        # Flavor wheel: angles proportional to the (weighted) number of leaves under each node
+        leaf_counts = self.leaf_counts
+        for index in reversed(range(len(self.labels))):
+            if self.child_count[index]:
+                first_child = self.first_child[index]
+                leaf_counts[index] = sum(leaf_counts[first_child:first_child + self.child_count[index]])
+            else:
+                leaf_counts[index] = angle_rules.leaf_weight(self.weights[index], self.labels[index])
+
+        for first_index, end_index, group_start_angle, group_end_angle in self._drawn_sibling_groups(start_angle, end_angle):
+            self._assign_spans(first_index, angle_rules.leaf_spans(leaf_counts[first_index:end_index],
+                                                                   group_start_angle, group_end_angle))
+
+    def assign_percentage_angles(self, start_angle=0.0, end_angle=1.0):
+        # Percentage wheel: the unspecified percentages are filled in, like on the Node objects
+        percentages = self.percentages
+        for first_index, end_index, group_start_angle, group_end_angle in self._drawn_sibling_groups(start_angle, end_angle):
+            group_percentages = angle_rules.resolve_percentages(percentages[first_index:end_index])
+            percentages[first_index:end_index] = group_percentages
+            self._assign_spans(first_index, angle_rules.percentage_spans(group_percentages, group_start_angle, group_end_angle))
+
+    # Geometry
+    # ------------------------------------
+
+    def level_draw_order(self, level_number):
+        # Indices of the drawn nodes of a level, ordered by start_angle like _process_level
+        first_index, end_index = self.level_ranges[level_number - 1]
+        start_angles = self.start_angles
+        end_angles = self.end_angles
+        indices = sorted(range(first_index, end_index),
+                         key=lambda index: 0 if math.isnan(start_angles[index]) else start_angles[index])
+        return [index for index in indices
+                if not math.isnan(start_angles[index]) and not math.isnan(end_angles[index])]
+
+    def level_geometry(self, indices, placements, inner_radius, outer_radius, center_x, center_y,
+                       text_width, text_height, level_number):
+        """
+        Compute (mid_angle_deg, cos_theta, sin_theta, x_text, y_text) for the given nodes of a level,
+        as a batch: vectorized with NumPy when available, in pure Python otherwise.
+        """
+        if np is not None and len(indices) >= self.NUMPY_MIN_BATCH:
+            return self._level_geometry_numpy(indices, placements, inner_radius, outer_radius,
+                                              center_x, center_y, text_width, text_height, level_number)
+
+        geometry = []
+        for index, placement in zip(indices, placements):
+            start_angle = self.start_angles[index]
+            end_angle = self.end_angles[index]
+            if end_angle < start_angle:
+                end_angle += 1.0  # Adjust for wrapping around
+            mid_angle = (start_angle + end_angle) / 2.0
+            if mid_angle >= 1.0:
+                mid_angle -= 1.0  # Normalize back to range [0, 1)
+            mid_angle_deg = (mid_angle * 360.0) - 90.0
+            if mid_angle_deg < 0:
+                mid_angle_deg += 360.0
+            theta_rad = math.radians(mid_angle_deg)
+            cos_theta = math.cos(theta_rad)
+            sin_theta = math.sin(theta_rad)
+
+            r_text = ColumnarTree._text_radius(placement, inner_radius, outer_radius, text_height, level_number)
+            x_text = center_x + r_text * cos_theta - text_width / 2
+            y_text = center_y + r_text * sin_theta - text_height / 2
+            geometry.append((mid_angle_deg, cos_theta, sin_theta, x_text, y_text))
+        return geometry
+
+    def _level_geometry_numpy(self, indices, placements, inner_radius, outer_radius, center_x, center_y,
+                              text_width, text_height, level_number):
+        index_array = np.asarray(indices, dtype=np.intp)
+        start_angles = np.frombuffer(self.start_angles, dtype=np.float64)[index_array]
+        end_angles = np.frombuffer(self.end_angles, dtype=np.float64)[index_array]
+
+        end_angles = np.where(end_angles < start_angles, end_angles + 1.0, end_angles)
+        mid_angles = (start_angles + end_angles) / 2.0
+        mid_angles = np.where(mid_angles >= 1.0, mid_angles - 1.0, mid_angles)
+        mid_angles_deg = (mid_angles * 360.0) - 90.0
+        mid_angles_deg = np.where(mid_angles_deg < 0, mid_angles_deg + 360.0, mid_angles_deg)
+        theta_rad = np.radians(mid_angles_deg)
+        cos_theta = np.cos(theta_rad)
+        sin_theta = np.sin(theta_rad)
+
+        text_radius_by_placement = {}
+        r_text = np.array([
+            text_radius_by_placement[placement] if placement in text_radius_by_placement
+            else text_radius_by_placement.setdefault(
+                placement, ColumnarTree._text_radius(placement, inner_radius, outer_radius, text_height, level_number))
+            for placement in placements
+        ], dtype=np.float64)
+        x_text = center_x + r_text * cos_theta - text_width / 2
+        y_text = center_y + r_text * sin_theta - text_height / 2
+
+        # Back to Python floats, so the serialized values are the same as the pure-Python path
+        return list(zip(mid_angles_deg.tolist(), cos_theta.tolist(), sin_theta.tolist(),
+                        x_text.tolist(), y_text.tolist()))
+
+    @staticmethod
+    def _text_radius(placement, inner_radius, outer_radius, text_height, level_number):
+        # Same radii as Wheel.compute_text_position_option
+        if placement == 'callout':
+            return outer_radius + (30 + (level_number * 10))
+        elif placement == 'outside':
+            return outer_radius + text_height / 2 + 5
+        elif placement == 'inside_top':
+            return outer_radius - text_height / 2
+        return (inner_radius + outer_radius) / 2
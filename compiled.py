@@ -0,0 +1,197 @@
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+from columnar import ColumnarTree
+
+# File layout (little-endian):
+#   MAGIC, format version (uint32), header length (uint64), header JSON padded to 8 bytes,
+#   then the data sections of the structures, each aligned to 8 bytes.
+# The header JSON holds the wheel type, the levels_config, the resolved level configs, the
+# table of node styles and, for each structure, its level ranges and the (offset, length)
+# of its sections in the data region.
+MAGIC = b'WHLC'
+FORMAT_VERSION = 1
+_PREFIX = struct.Struct('<4sIQ')
+
+# ColumnarTree arrays stored as sections, besides the labels and the style indices
+INT_SECTIONS = ('parents', 'depths', 'first_child', 'child_count')
+FLOAT_SECTIONS = ('percentages', 'start_angles', 'end_angles')  # NaN percentage: none given
+_LITTLE_ENDIAN = sys.byteorder == 'little'
+
+
+def is_compiled(filename):
+    try:
+        with open(filename, 'rb') as compiled_file:
+            return compiled_file.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class _LabelTable:
+    # Labels decoded on access from the UTF-8 blob of a structure
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        return str(self.blob[self.offsets[index]:self.offsets[index + 1]], 'utf-8')
+
+
+class _StyleTable:
+    # Style tuple of each node (None when the node has no own style), from a shared table
+    def __init__(self, indices, styles):
+        self.indices = indices
+        self.styles = styles
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, index):
+        style_index = self.indices[index]
+        return self.styles[style_index] if style_index >= 0 else None
+
+
+class CompiledWriter:
+    """
+    Write flattened wheel structures (ColumnarTree with assigned angles) to a compiled file.
+    The sections are spooled to a temporary file as the structures are added, so a spec can
+    be compiled one structure at a time.
+    """
+    def __init__(self, wheel_type, levels_config):
+        self.wheel_type = wheel_type
+        self.levels_config = levels_config
+        self.structures = []
+        self.styles = []
+        self._style_indices = {}
+        self._data = tempfile.TemporaryFile()
+
+    def _write_section(self, data):
+        offset = self._data.tell()
+        self._data.write(data)
+        self._data.write(bytes(-len(data) % 8))  # Keep the next section aligned
+        return [offset, len(data)]
+
+    def _style_index(self, style):
+        if style is None:
+            return -1
+        key = json.dumps(style)
+        if key not in self._style_indices:
+            self._style_indices[key] = len(self.styles)
+            self.styles.append(style)
+        return self._style_indices[key]
+
+    def add_structure(self, name, tree, source_hash):
+        label_blob = bytearray()
+        label_offsets = array('q', [0])
+        for label in tree.labels:
+            label_blob += str(label).encode('utf-8')
+            label_offsets.append(len(label_blob))
+
+        columns = {
+            'parents': array('q', tree.parents),
+            'depths': array('q', tree.depths),
+            'first_child': array('q', tree.first_child),
+            'child_count': array('q', tree.child_count),
+            'style_indices': array('q', (self._style_index(style) for style in tree.node_styles)),
+            'label_offsets': label_offsets,
+            'percentages': array('d', (math.nan if percentage is None else percentage for percentage in tree.percentages)),
+            'start_angles': array('d', tree.start_angles),
+            'end_angles': array('d', tree.end_angles),
+        }
+        sections = {}
+        for section_name, column in columns.items():
+            if not _LITTLE_ENDIAN:
+                column.byteswap()
+            sections[section_name] = self._write_section(column.tobytes())
+        sections['labels'] = self._write_section(bytes(label_blob))
+
+        self.structures.append({
+            'name': name,
+            'source_hash': source_hash,
+            'node_count': len(tree),
+            'root_count': tree.root_count,
+            'level_ranges': [list(level_range) for level_range in tree.level_ranges],
+            'sections': sections,
+        })
+
+    def write(self, output_filename, level_configs, code_version):
+        header = json.dumps({
+            'type': self.wheel_type,
+            'levels_config': self.levels_config,
+            'level_configs': level_configs,
+            'code_version': code_version,
+            'styles': self.styles,
+            'structures': self.structures,
+        }, ensure_ascii=False).encode('utf-8')
+        header += b' ' * (-len(header) % 8)
+
+        temp_filename = f"{output_filename}.{os.getpid()}.tmp"
+        with open(temp_filename, 'wb') as compiled_file:
+            compiled_file.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header)))
+            compiled_file.write(header)
+            self._data.seek(0)
+            while chunk := self._data.read(1024 * 1024):
+                compiled_file.write(chunk)
+        os.replace(temp_filename, output_filename)
+        self._data.close()
+
+
+class CompiledSpec:
+    """
+    Memory-mapped compiled file. The trees returned by tree() are ColumnarTree objects whose
+    arrays are memoryviews over the mapping (no parsing and no copy), with the angles already
+    assigned: they can be rendered, not re-assigned. Labels are decoded on access.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, 'rb') as compiled_file:
+            self._mapping = mmap.mmap(compiled_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, header_length = _PREFIX.unpack_from(self._mapping, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{filename} is not a compiled wheel file")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{filename} has the compiled format version {version}, expected {FORMAT_VERSION}: compile it again")
+
+        header = json.loads(self._mapping[_PREFIX.size:_PREFIX.size + header_length])
+        self.wheel_type = header['type']
+        self.levels_config = header['levels_config']
+        self.level_configs = header['level_configs']
+        self.code_version = header['code_version']
+        self.styles = [tuple(style) for style in header['styles']]
+        self.structures = {structure['name']: structure for structure in header['structures']}
+        self._data = memoryview(self._mapping)[_PREFIX.size + header_length:]
+
+    def _section(self, structure, section_name, typecode):
+        offset, length = structure['sections'][section_name]
+        view = self._data[offset:offset + length]
+        if typecode == 'B':
+            return view
+        if _LITTLE_ENDIAN:
+            return view.cast(typecode)
+        column = array(typecode)  # Big-endian platforms pay for a copy
+        column.frombytes(view)
+        column.byteswap()
+        return column
+
+    def tree(self, name):
+        structure = self.structures[name]
+        tree = ColumnarTree()
+        tree.root_count = structure['root_count']
+        tree.level_ranges = [tuple(level_range) for level_range in structure['level_ranges']]
+        for section_name in INT_SECTIONS:
+            setattr(tree, section_name, self._section(structure, section_name, 'q'))
+        for section_name in FLOAT_SECTIONS:
+            setattr(tree, section_name, self._section(structure, section_name, 'd'))
+        tree.labels = _LabelTable(self._section(structure, 'label_offsets', 'q'), self._section(structure, 'labels', 'B'))
+        tree.node_styles = _StyleTable(self._section(structure, 'style_indices', 'q'), self.styles)
+        tree.resolved_properties = [None] * structure['node_count']
+        return tree
@@ -1,22 +1,166 @@
+import base64
+import re
+import tempfile
+import zlib
+from urllib.parse import quote
+
+
+class SpooledCellBuffer:
+    """
+    Append-only buffer of serialized cells. Content is kept in memory up to
+    max_size and spilled to a temporary file beyond that; iterating over the
+    buffer yields its content back in chunks.
+    """
+    def __init__(self, max_size, chunk_size=64 * 1024):
+        self.chunk_size = chunk_size
+        self._file = tempfile.SpooledTemporaryFile(max_size=max_size, mode='w+', encoding='utf-8')
+
+    def append(self, cell_xml):
+        self._file.write(cell_xml)
+
+    def __iter__(self):
+        self._file.seek(0)
+        while True:
+            chunk = self._file.read(self.chunk_size)
+            if not chunk:
+                break
+            yield chunk
+        self._file.seek(0, 2)  # Back to the end, so more cells can be appended
+
+    def close(self):
+        self._file.close()
+
+
+class CompressedPayloadEncoder:
+    """
+    Incremental encoder of a compressed draw.io diagram payload: the text is URI-encoded,
+    raw-deflated and base64-encoded, chunk by chunk.
+    draw.io reads the payload back with decodeURIComponent, which only rewrites the %XX
+    sequences: escaping '%' and the non-ASCII characters (as UTF-8) is enough, and much
+    cheaper than a full encodeURIComponent of the markup characters.
+    """
+    NON_ASCII_RUN = re.compile(r'[^\x00-\x7f]+')
+    BATCH_SIZE = 64 * 1024
+
+    def __init__(self, level=zlib.Z_DEFAULT_COMPRESSION):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        self._pending = b''  # Deflated bytes not base64-encoded yet (base64 works on 3-byte groups)
+
+    def _encode(self, data):
+        data = self._pending + data
+        cut = len(data) - len(data) % 3
+        self._pending = data[cut:]
+        return base64.b64encode(data[:cut]).decode('ascii')
+
+    @staticmethod
+    def encode_uri_component(text):
+        text = text.replace('%', '%25')
+        if not text.isascii():
+            text = CompressedPayloadEncoder.NON_ASCII_RUN.sub(lambda match: quote(match.group()), text)
+        return text
+
+    def encode(self, text):
+        return self._encode(self._compressor.compress(self.encode_uri_component(text).encode('ascii')))
+
+    def flush(self):
+        payload = self._encode(self._compressor.flush())
+        return payload + base64.b64encode(self._pending).decode('ascii')
+
+
 class DiagramGenerator:
-    def __init__(self):
-        self.shapes = []
-        self.text_elements = []
-        self.edges = []
+    # Default in-memory size of each cell buffer in streaming mode, before spilling to disk
+    DEFAULT_SPOOL_SIZE = 1024 * 1024
+
+    # A document is MXFILE_HEADER, its <diagram> pages separated by PAGE_SEPARATOR, MXFILE_FOOTER
+    MXFILE_HEADER = '<mxfile host="Electron">\n'
+    PAGE_SEPARATOR = '\n'
+    MXFILE_FOOTER = '\n</mxfile>'
+
+    # Default style of the lines drawn by add_line, overridden by its style_dict
+    LINE_STYLE_DEFAULTS = {
+        "strokeColor": "#000000",
+        "strokeWidth": "1",
+        "endArrow": "none"
+    }
+
+    def __init__(self, streaming=False, spool_size=DEFAULT_SPOOL_SIZE):
+        # In streaming mode the cells are spooled instead of being kept in lists, so the
+        # memory used does not grow with the size of the diagram
+        self.streaming = streaming
+        if streaming:
+            self.shapes = SpooledCellBuffer(spool_size)
+            self.text_elements = SpooledCellBuffer(spool_size)
+            self.edges = SpooledCellBuffer(spool_size)
+        else:
+            self.shapes = []
+            self.text_elements = []
+            self.edges = []
         self.id_counter = 2  # Start from 2 since 0 and 1 are used
         self.root_cells = [
             '<mxCell id="0"/>',
             '<mxCell id="1" parent="0"/>',
         ]
+        # Interned style and geometry strings: most cells of a level share their colors,
+        # opacity, font size and radius, so the constant parts of the cells are built once
+        # per combination of values. The keys hold the value types too: 90 == 90.0, but they
+        # are written as '90' and '90.0'
+        self._shape_styles = {}
+        self._shape_geometries = {}
+        self._text_styles = {}
+        self._line_style_templates = {}
+
+    def _shape_style(self, shape, fill_color, stroke_color, opacity):
+        key = (shape, fill_color, stroke_color, opacity, type(fill_color), type(stroke_color), type(opacity))
+        style = self._shape_styles.get(key)
+        if style is None:
+            style = self._shape_styles[key] = f'{shape}fillColor={fill_color};strokeColor={stroke_color};opacity={opacity};'
+        return style
+
+    def _shape_geometry(self, center_x, center_y, radius):
+        # End of a shape cell centered on (center_x, center_y): the same for a whole level
+        key = (center_x, center_y, radius, type(center_x), type(center_y), type(radius))
+        geometry = self._shape_geometries.get(key)
+        if geometry is None:
+            geometry = self._shape_geometries[key] = (
+                f'" vertex="1" parent="1">\n'
+                f'<mxGeometry x="{center_x - radius}" y="{center_y - radius}" width="{2 * radius}" height="{2 * radius}" as="geometry"/>\n'
+                f'</mxCell>\n'
+            )
+        return geometry
+
+    def _text_style(self, font_size, font_color, opacity):
+        # (head, tail) of the text style, around the rotation of each element
+        key = (font_size, font_color, opacity, type(font_size), type(font_color), type(opacity))
+        style = self._text_styles.get(key)
+        if style is None:
+            style = self._text_styles[key] = (
+                f'text;html=1;align=center;verticalAlign=middle;fontSize={font_size};rotation=',
+                f';fontColor={font_color};opacity={opacity};'
+            )
+        return style
+
+    def _line_style_template(self, style_keys):
+        # (template, field keys) of the line style for a set of style_dict keys: the defaults
+        # that are not overridden are baked into the format template, the style_dict values
+        # fill its fields
+        template = self._line_style_templates.get(style_keys)
+        if template is None:
+            parts, field_keys = [], []
+            for key in {**DiagramGenerator.LINE_STYLE_DEFAULTS, **dict.fromkeys(style_keys)}:
+                if key in style_keys:
+                    parts.append(key.replace('{', '{{').replace('}', '}}') + '={}')
+                    field_keys.append(key)
+                else:
+                    parts.append(f"{key}={DiagramGenerator.LINE_STYLE_DEFAULTS[key]}".replace('{', '{{').replace('}', '}}'))
+            template = self._line_style_templates[style_keys] = (";".join(parts), tuple(field_keys))
+        return template
 
     def add_pie_slice(self, center_x, center_y, radius, start_angle, end_angle, fill_color, stroke_color, opacity):
         element_id = self.id_counter
         shape_xml = (
             f'<mxCell id="{self.id_counter}" value="" '
-            f'style="shape=mxgraph.basic.pie;fillColor={fill_color};strokeColor={stroke_color};opacity={opacity};startAngle={start_angle};endAngle={end_angle};" '
-            f'vertex="1" parent="1">\n'
-            f'<mxGeometry x="{center_x - radius}" y="{center_y - radius}" width="{2 * radius}" height="{2 * radius}" as="geometry"/>\n'
-            f'</mxCell>\n'
+            f'style="{self._shape_style("shape=mxgraph.basic.pie;", fill_color, stroke_color, opacity)}startAngle={start_angle};endAngle={end_angle};'
+            f'{self._shape_geometry(center_x, center_y, radius)}'
         )
         self.shapes.append(shape_xml)
         self.id_counter += 1
@@ -26,10 +170,8 @@ class DiagramGenerator:
         element_id = self.id_counter
         shape_xml = (
             f'<mxCell id="{self.id_counter}" value="" '
-            f'style="shape=mxgraph.basic.partConcEllipse;fillColor={fill_color};strokeColor={stroke_color};opacity={opacity};startAngle={start_angle};endAngle={end_angle};arcWidth={arc_width};" '
-            f'vertex="1" parent="1">\n'
-            f'<mxGeometry x="{center_x - outer_radius}" y="{center_y - outer_radius}" width="{2 * outer_radius}" height="{2 * outer_radius}" as="geometry"/>\n'
-            f'</mxCell>\n'
+            f'style="{self._shape_style("shape=mxgraph.basic.partConcEllipse;", fill_color, stroke_color, opacity)}startAngle={start_angle};endAngle={end_angle};arcWidth={arc_width};'
+            f'{self._shape_geometry(center_x, center_y, outer_radius)}'
         )
         self.shapes.append(shape_xml)
         self.id_counter += 1
@@ -41,10 +183,8 @@ class DiagramGenerator:
         element_id = self.id_counter
         shape_xml = (
             f'<mxCell id="{self.id_counter}" value="" '
-            f'style="ellipse;whiteSpace=wrap;html=1;aspect=fixed;fillColor={fill_color};strokeColor={stroke_color};opacity={opacity};" '
-            f'vertex="1" parent="1">\n'
-            f'<mxGeometry x="{center_x - radius}" y="{center_y - radius}" width="{2 * radius}" height="{2 * radius}" as="geometry"/>\n'
-            f'</mxCell>\n'
+            f'style="{self._shape_style("ellipse;whiteSpace=wrap;html=1;aspect=fixed;", fill_color, stroke_color, opacity)}'
+            f'{self._shape_geometry(center_x, center_y, radius)}'
         )
         self.shapes.append(shape_xml)
         self.id_counter += 1
@@ -71,10 +211,11 @@ class DiagramGenerator:
 
 
     def add_text_element(self, text, x, y, width, height, rotation, font_size, font_color, opacity):
-        element_id = self.id_counter        
+        element_id = self.id_counter
+        style_head, style_tail = self._text_style(font_size, font_color, opacity)
         shape_xml = (
             f'<mxCell id="{self.id_counter}" value="{text}" '
-            f'style="text;html=1;align=center;verticalAlign=middle;fontSize={font_size};rotation={rotation};fontColor={font_color};opacity={opacity};" '
+            f'style="{style_head}{rotation}{style_tail}" '
             f'vertex="1" parent="1">\n'
             f'<mxGeometry x="{x}" y="{y}" width="{width}" height="{height}" as="geometry"/>\n'
             f'</mxCell>\n'
@@ -101,14 +242,9 @@ class DiagramGenerator:
     def add_line(self, source_id, target_id, x1, y1, x2, y2, style_dict=None):
         if style_dict is None:
             style_dict = {}
-        # Default styles
-        style_defaults = {
-            "strokeColor": "#000000",
-            "strokeWidth": "1",
-            "endArrow": "none"
-        }
-        # Merge default styles with provided styles
-        style = ";".join(f"{k}={v}" for k, v in {**style_defaults, **style_dict}.items())
+        # Merge default styles with provided styles, through the template of the style_dict keys
+        template, field_keys = self._line_style_template(tuple(style_dict))
+        style = template.format(*[style_dict[key] for key in field_keys])
         element_id = self.id_counter
         edge_xml = (
             f'<mxCell id="{element_id}" style="{style}" edge="1" parent="1" source="{source_id}" target="{target_id}">\n'
@@ -123,19 +259,59 @@ class DiagramGenerator:
         return element_id
         
 
-    def generate_xml(self, name):
-        xml_content = (
-            '<mxfile host="Electron">\n'
-            f'<diagram name="Generic Wheel - {name}">\n'
-            '<mxGraphModel>\n'
-            '<root>\n'
-        )
-        xml_content += '\n'.join(self.root_cells) + '\n'
-        xml_content += ''.join(self.shapes)        # Add shapes first
-        xml_content += ''.join(self.text_elements) # Add text elements after shapes
-        xml_content += ''.join(self.edges)         # Add edges after text elements
-        xml_content += '</root>\n</mxGraphModel>\n</diagram>\n</mxfile>'
-        return xml_content
+    def iter_graph_model(self):
+        # Yield the mxGraphModel in chunks, keeping the z-order: shapes, then text elements, then edges
+        yield '<mxGraphModel>\n<root>\n'
+        yield '\n'.join(self.root_cells) + '\n'
+        yield from self.shapes         # Add shapes first
+        yield from self.text_elements  # Add text elements after shapes
+        yield from self.edges          # Add edges after text elements
+        yield '</root>\n</mxGraphModel>'
+
+    def iter_xml(self, name, compressed=False):
+        # Yield the single-page document in chunks
+        yield DiagramGenerator.MXFILE_HEADER
+        yield from self.iter_page(name, compressed)
+        yield DiagramGenerator.MXFILE_FOOTER
+
+    def iter_page(self, name, compressed=False):
+        # Yield the <diagram> page in chunks. Compressed pages hold the mxGraphModel as a
+        # deflated, base64-encoded payload, like the files saved by draw.io with compression on
+        if compressed:
+            yield f'<diagram name="Generic Wheel - {name}">'
+            encoder = CompressedPayloadEncoder()
+            batch, batch_size = [], 0
+            for chunk in self.iter_graph_model():
+                # Encode in batches: the cells of in-memory diagrams are small chunks
+                batch.append(chunk)
+                batch_size += len(chunk)
+                if batch_size >= CompressedPayloadEncoder.BATCH_SIZE:
+                    yield encoder.encode(''.join(batch))
+                    batch, batch_size = [], 0
+            yield encoder.encode(''.join(batch)) + encoder.flush()
+            yield '</diagram>'
+        else:
+            yield f'<diagram name="Generic Wheel - {name}">\n'
+            yield from self.iter_graph_model()
+            yield '\n</diagram>'
+
+    def generate_xml(self, name, compressed=False):
+        return ''.join(self.iter_xml(name, compressed))
+
+    def write_xml(self, name, file, compressed=False):
+        # Stream the document to a file-like object without building it in memory
+        for chunk in self.iter_xml(name, compressed):
+            file.write(chunk)
+
+    def write_page(self, name, file, compressed=False):
+        # Stream the <diagram> page alone, to be assembled into a multi-page document
+        for chunk in self.iter_page(name, compressed):
+            file.write(chunk)
+
+    def close(self):
+        if self.streaming:
+            for buffer in (self.shapes, self.text_elements, self.edges):
+                buffer.close()
 
 
 
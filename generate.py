@@ -4,11 +4,43 @@ import math
 import logging
 import argparse
 import os
+import shutil
+import tempfile
+import glob
+import gzip
 import logging
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+import drawio
 from drawio import DiagramGenerator
+import svg
+from svg import SVGGenerator
+from topology import FilledDiagram, Skeleton, slotted_structure, split_labels
+from render_cache import RenderCache, XMLRenderCache, default_cache_dir, source_fingerprint
+import callout_layout
+from callout_layout import CalloutLayout
+import text_metrics
+from text_metrics import LabelFitter
+import angle_rules
+import columnar
+from columnar import ColumnarTree
+from profiling import Profiler, NullProfiler
+from json_stream import iter_spec_structures
+from compiled import CompiledSpec, CompiledWriter, is_compiled
 from typing import List
+from collections import namedtuple, Counter, deque, OrderedDict
+from operator import attrgetter
 
-logger=None 
+# Module logger: usable as a library without initialize_logger (no handler is attached until then)
+logger = logging.getLogger('XMLGeneratorLogger')
+
+# Per-node log messages (node creation, angles, drawing) are only emitted when node tracing is
+# enabled; otherwise the hot paths only log an aggregate summary per level
+node_tracing = False
+
+# Phase timers and counters, only collected when profiling is enabled (--profile)
+profiler = NullProfiler()
 
 def initialize_logger(log_level):
     logger = logging.getLogger('XMLGeneratorLogger')
@@ -26,53 +58,97 @@ def _get_config_value( value, level):
 
 
 
+# Style properties resolved for each node, in the layout of ResolvedProperties
+RESOLVED_PROPERTY_NAMES = (
+    'text_rotation', 'text_placement', 'font_size', 'shape_color',
+    'text_color', 'shape_opacity', 'text_opacity'
+)
+COLOR_PROPERTY_NAMES = ('shape_color', 'text_color')
+
+# Fixed-layout tuple of the resolved style properties of a node
+ResolvedProperties = namedtuple('ResolvedProperties', RESOLVED_PROPERTY_NAMES)
+_own_property_values = attrgetter(*RESOLVED_PROPERTY_NAMES)
+_NO_PROPERTY_VALUES = (None,) * len(RESOLVED_PROPERTY_NAMES)
+
+
 class Node:
+    # Declared attributes only: no per-instance __dict__. Node keys from the JSON that are
+    # not declared here are kept in the small `extra_properties` side table
+    __slots__ = (
+        'label', 'sub_nodes', 'parent_node', 'percentage', 'weight', 'level',
+        'start_angle', 'end_angle', 'leaf_count', 'shape_id', 'text_id',
+        'resolved_properties', 'extra_properties',
+    ) + RESOLVED_PROPERTY_NAMES
+
     def __init__(self, label, **kwargs):
         self.label = label
-        self.sub_nodes = []
+        self.sub_nodes = ()  # Leaves share the empty tuple, parents get a list of Nodes
         self.parent_node = None  # Parent node reference
+        self.level = None
         self.percentage = kwargs.pop('percentage', None)
-        for key, value in kwargs.items():
-            setattr(self, key, value)
+        self.weight = kwargs.pop('weight', None)
+        for prop in RESOLVED_PROPERTY_NAMES:
+            setattr(self, prop, kwargs.pop(prop, None))
+        self.extra_properties = kwargs or None
         self.start_angle = None
         self.end_angle = None
+        self.leaf_count = None  # Number of (weighted) leaves under this node, set by FlavorWheel
         self.shape_id = None   # The corresponding drawio shape element ( if drawed) 
         self.text_id = None    # The corresponding drawio text (label) element ( if drawed ) 
-        self.resolved_properties = {}
+        self.resolved_properties = None
 
-    def resolve_properties(self, level_config, level_number):
+    def __getattr__(self, name):
+        # Only called for names that are not declared: look them up in the side table
+        if name != 'extra_properties':
+            extra_properties = self.extra_properties
+            if extra_properties and name in extra_properties:
+                return extra_properties[name]
+        raise AttributeError(f"'Node' object has no attribute '{name}'")
+
+    def resolve_properties(self, level_config, level_number, level_properties=None):
         """
         Resolve properties for this node by considering:
         - Node's own properties
         - Parent node's properties
         - Level configuration
+        level_properties: the level config compiled by LevelConfigResolver.level_properties
+        (compiled here when not given)
         """
-        property_names = [
-            'text_rotation', 'text_placement', 'font_size', 'shape_color',
-            'text_color', 'shape_opacity', 'text_opacity'
-        ]
-
-        # Initialize resolved_properties with an empty dict
-        self.resolved_properties = {}
+        if level_properties is None:
+            level_properties = LevelProperties(level_config, level_number)
+        parent_properties = self.parent_node.resolved_properties if self.parent_node is not None else None
+        node_values = _own_property_values(self)
+        self.resolved_properties = level_properties.resolve(
+            node_values if node_values != _NO_PROPERTY_VALUES else None, parent_properties
+        )
 
-        for prop in property_names:
-            parent_value = getattr(self.parent_node, 'resolved_properties', {}).get(prop)
-            node_value = getattr(self, prop, None)
+    @staticmethod
+    def resolve_property_values(node_values, level_config, level_number, parent_properties):
+        # Reference resolution, property by property, of what LevelProperties.resolve computes.
+        # node_values and parent_properties are in the RESOLVED_PROPERTY_NAMES layout
+        resolved_values = []
+
+        for index, prop in enumerate(RESOLVED_PROPERTY_NAMES):
+            parent_value = parent_properties[index] if parent_properties is not None else None
+            node_value = node_values[index]
             level_value = level_config.get(prop)
 
             # Handle color properties separately
-            if prop in ['shape_color', 'text_color']:
-                resolved_value = self.resolve_color_property(
+            if prop in COLOR_PROPERTY_NAMES:
+                resolved_value = Node.resolve_color_property(
                     prop, node_value, level_value, parent_value, level_number
                 )
             else:
-                resolved_value = self.resolve_generic_property(
+                resolved_value = Node.resolve_generic_property(
                     prop, node_value, level_value, parent_value, level_number
                 )
 
-            self.resolved_properties[prop] = resolved_value
+            resolved_values.append(resolved_value)
+
+        return ResolvedProperties._make(resolved_values)
 
-    def resolve_generic_property(self, prop, node_value, level_value, parent_value, level):
+    @staticmethod
+    def resolve_generic_property(prop, node_value, level_value, parent_value, level):
         """
         Resolve non-color properties by checking node, level, and parent values.
         """
@@ -82,22 +158,24 @@ class Node:
             return _get_config_value(level_value, level)
         return parent_value  # Inherit from parent if available
 
-    def resolve_color_property(self, prop, node_value, level_value, parent_value, level):
+    @staticmethod
+    def resolve_color_property(prop, node_value, level_value, parent_value, level):
         """
         Resolve color properties with special handling for lists and inheritance.
         """
         # First, check node's own property
         if node_value is not None:
             value = _get_config_value(node_value, level)
-            return self._extract_color_from_value(value, level)
+            return Node._extract_color_from_value(value, level)
         # Next, check level configuration
         if level_value is not None:
             value = _get_config_value(level_value, level)
-            return self._extract_color_from_value(value, level)
+            return Node._extract_color_from_value(value, level)
         # Finally, inherit from parent
         return parent_value
 
-    def _extract_color_from_value(self, value, level):
+    @staticmethod
+    def _extract_color_from_value(value, level):
         """
         Handle color values that might be a list or a single value.
         """
@@ -110,6 +188,60 @@ class Node:
             return value
 
 
+class LevelProperties:
+    """
+    Style properties of the nodes of one level, compiled once from its level config: the
+    level values (per-level callables evaluated, colors picked from their lists) are
+    resolved when the level is compiled, so resolving a node only applies its own values
+    and, for the properties the level does not set, the values of its parent.
+    Records are shared while nothing changes them: nodes without own values get the level
+    record itself, or the one inheriting from their parent (built once for consecutive
+    siblings), and a node with own values gets a copy with them.
+    """
+    def __init__(self, level_config, level_number):
+        self.level_number = level_number
+        values = []
+        inherited = []  # Properties the level does not set, inherited from the parent
+        for index, prop in enumerate(RESOLVED_PROPERTY_NAMES):
+            level_value = level_config.get(prop)
+            if level_value is None:
+                inherited.append(index)
+                values.append(None)
+            else:
+                values.append(LevelProperties._resolve_value(prop, level_value, level_number))
+        self.inherited = tuple(inherited)
+        self.record = ResolvedProperties._make(values)
+        # Last parent record, and the level record with the values inherited from it
+        self._parent_properties = None
+        self._inheriting_record = self.record
+
+    @staticmethod
+    def _resolve_value(prop, value, level_number):
+        if prop in COLOR_PROPERTY_NAMES:
+            return Node.resolve_color_property(prop, value, None, None, level_number)
+        return Node.resolve_generic_property(prop, value, None, None, level_number)
+
+    def resolve(self, node_values, parent_properties):
+        # node_values: the node's own values in the RESOLVED_PROPERTY_NAMES layout, or None when it has none
+        record = self.record
+        if self.inherited and parent_properties is not None:
+            if parent_properties is not self._parent_properties:
+                values = list(record)
+                for index in self.inherited:
+                    values[index] = parent_properties[index]
+                self._parent_properties = parent_properties
+                self._inheriting_record = ResolvedProperties._make(values)
+            record = self._inheriting_record
+        if node_values is None:
+            return record
+
+        values = list(record)
+        for index, node_value in enumerate(node_values):
+            if node_value is not None:
+                values[index] = LevelProperties._resolve_value(RESOLVED_PROPERTY_NAMES[index], node_value, self.level_number)
+        return ResolvedProperties._make(values)
+
+
 class Level:
     def __init__(self, level_number, previous_level=None):
         self.level_number = level_number
@@ -152,90 +284,85 @@ class Level:
                 'text_placement': 'centered',
             }
 
-    def get_level_config(self, json_levels_config, silent=False):
+    def get_level_config(self, json_levels_config, silent=False, resolver=None):
+        # Resolve through a (possibly shared) resolver, so every level of the chain is
+        # merged and prepared exactly once instead of recursing through all previous levels
+        if resolver is None:
+            resolver = LevelConfigResolver(json_levels_config)
+        self.level_config = resolver.resolve(self.level_number, silent)
+        return self.level_config
+
+    @staticmethod
+    def _merge_level_config(level_number, json_level_config, silent=False):
         # Get default config for the level
-        default_level_config = Level.default_config(self.level_number)
-        level_config = None
-        # Check if there's a configuration for the level in the JSON data
-        for config in json_levels_config:
-            if self._level_in_config(self.level_number, config.get('levels')):
-                if not silent:
-                    logger.debug(f"Getting level {self.level_number} config from json data")
-                level_config = config.copy()
-                break  # Stop after finding the first matching config
+        default_level_config = Level.default_config(level_number)
 
-        if level_config is None:
+        if json_level_config is None:
             # Use the default config if none found in the JSON
-            level_config = default_level_config
             if not silent:
-                logger.debug(f"Using default config for level {self.level_number}")
-        else:
-            # Start with level_config (since level-specific config takes priority)
-            merged_config = level_config.copy()
-            conflicting_properties = [
-                ['outer_radius', 'outer_radius_increment'],
-                ['inner_radius', 'inner_radius_increment']
-            ]  # List of lists, inner lists contain the properties that conflict with each other
-
-            # Handle radius conflicts for both outer and inner radii
-            for conflicting_property_list in conflicting_properties:
-                # Check if this is level 1 where increments are not allowed
-                if self.level_number == 1:
-                    # If any increment property is defined, use the corresponding radius property from default
+                logger.debug(f"Using default config for level {level_number}")
+            return default_level_config
+
+        if not silent:
+            logger.debug(f"Getting level {level_number} config from json data")
+        level_config = json_level_config.copy()
+
+        # Start with level_config (since level-specific config takes priority)
+        merged_config = level_config.copy()
+        conflicting_properties = [
+            ['outer_radius', 'outer_radius_increment'],
+            ['inner_radius', 'inner_radius_increment']
+        ]  # List of lists, inner lists contain the properties that conflict with each other
+
+        # Handle radius conflicts for both outer and inner radii
+        for conflicting_property_list in conflicting_properties:
+            # Check if this is level 1 where increments are not allowed
+            if level_number == 1:
+                # If any increment property is defined, use the corresponding radius property from default
+                for key in conflicting_property_list:
+                    if 'increment' in key and key in level_config:
+                        # Override increment with the non-increment default value
+                        radius_key = key.replace('_increment', '')
+                        if radius_key in default_level_config:
+                            merged_config[radius_key] = default_level_config[radius_key]
+                            if not silent:
+                                logger.debug(f"[level {level_number}]: {radius_key}={default_level_config[radius_key]} (default due to level 1 not accepting increments)")
+            else:
+                # For other levels, process the conflicting properties as normal
+                if not any(key in level_config for key in conflicting_property_list):
+                    # If none are defined, use the default values
                     for key in conflicting_property_list:
-                        if 'increment' in key and key in level_config:
-                            # Override increment with the non-increment default value
-                            radius_key = key.replace('_increment', '')
-                            if radius_key in default_level_config:
-                                merged_config[radius_key] = default_level_config[radius_key]
-                                if not silent:
-                                    logger.debug(f"[level {self.level_number}]: {radius_key}={default_level_config[radius_key]} (default due to level 1 not accepting increments)")
-                else:
-                    # For other levels, process the conflicting properties as normal
-                    if not any(key in level_config for key in conflicting_property_list):
-                        # If none are defined, use the default values
-                        for key in conflicting_property_list:
-                            if key in default_level_config:
-                                value = default_level_config[key]
-                                merged_config[key] = value
-                                if not silent:
-                                    logger.debug(f"[level {self.level_number}]: {key}={value} (default)")
-                    else:
-                        # Handle the case where properties are present in merged_config
-                        for key in conflicting_property_list:
-                            if key in merged_config:
-                                if not silent:
-                                    logger.debug(f"[level {self.level_number}]: {key}={merged_config[key]} (json levels_config)")
-
-            # Merge non-conflicting properties
-            for key, value in default_level_config.items():
-                if any(key in conflicting_property_list for conflicting_property_list in conflicting_properties):
-                    # Skip conflicting properties
-                    continue
-
-                # If key not found in level config, use the defaults
-                if key not in merged_config:
-                    merged_config[key] = value
-                    if not silent:
-                        logger.debug(f"[level {self.level_number}]: {key}={merged_config[key]} (default)")
+                        if key in default_level_config:
+                            value = default_level_config[key]
+                            merged_config[key] = value
+                            if not silent:
+                                logger.debug(f"[level {level_number}]: {key}={value} (default)")
                 else:
-                    if not silent:
-                        logger.debug(f"[level {self.level_number}]: {key}={merged_config[key]} (json levels_config)")
-
-            self.level_config = merged_config
+                    # Handle the case where properties are present in merged_config
+                    for key in conflicting_property_list:
+                        if key in merged_config:
+                            if not silent:
+                                logger.debug(f"[level {level_number}]: {key}={merged_config[key]} (json levels_config)")
+
+        # Merge non-conflicting properties
+        for key, value in default_level_config.items():
+            if any(key in conflicting_property_list for conflicting_property_list in conflicting_properties):
+                # Skip conflicting properties
+                continue
 
-        # Prepare the final configuration for the level 
-        ## Could need the previous level's config 
-        previous_level_config=None
-        if self.previous_level:
-            previous_level_config = self.previous_level.get_level_config(json_levels_config, silent)
-        self.level_config  = self._prepare_level_config(self.level_config, self.level_number, previous_level_config)
+            # If key not found in level config, use the defaults
+            if key not in merged_config:
+                merged_config[key] = value
+                if not silent:
+                    logger.debug(f"[level {level_number}]: {key}={merged_config[key]} (default)")
+            else:
+                if not silent:
+                    logger.debug(f"[level {level_number}]: {key}={merged_config[key]} (json levels_config)")
 
-        if not silent:
-            logger.debug(f"Level {self.level_number} config: {self.level_config }")
-        return self.level_config 
+        return merged_config
 
-    def _level_in_config(self, level_number, levels_entry):
+    @staticmethod
+    def _level_in_config(level_number, levels_entry):
         if levels_entry is None:
             return False
         if isinstance(levels_entry, int):
@@ -252,7 +379,8 @@ class Level:
             logger.warning(f"Unknown levels format in config: {levels_entry}")
             return False
 
-    def _prepare_level_config(self, config, level, previous_level_config):
+    @staticmethod
+    def _prepare_level_config(config, level, previous_level_config):
         # Prepare level configuration by calculating properties based on the level
         prepared_config = config.copy()
         if level == 1:
@@ -294,8 +422,79 @@ class Level:
         return prepared_config
 
 
+class LevelConfigResolver:
+    """
+    Resolve the prepared configuration of each level number exactly once, in order.
+    A level's prepared config only depends on its number and on the previous level's
+    outer radius, so the results are cached and shared by every structure of a wheel.
+    """
+    def __init__(self, json_levels_config):
+        self.json_levels_config = json_levels_config
+        self._entries_by_level = {}    # level number -> matching levels_config entry (or None)
+        self._prepared_configs = {}    # level number -> prepared level config
+        self._level_properties = {}    # level number -> LevelProperties compiled from the prepared config
+
+    def get_entry(self, level_number):
+        # Compiled lookup: the levels_config entries are only matched once per level number
+        if level_number not in self._entries_by_level:
+            self._entries_by_level[level_number] = next(
+                (config for config in self.json_levels_config
+                 if Level._level_in_config(level_number, config.get('levels'))),
+                None
+            )
+        return self._entries_by_level[level_number]
+
+    def resolve(self, level_number, silent=False):
+        if level_number in self._prepared_configs:
+            return self._prepared_configs[level_number]
+
+        # Walk up from the first level that still has to be prepared
+        first_missing = level_number
+        while first_missing > 1 and (first_missing - 1) not in self._prepared_configs:
+            first_missing -= 1
+
+        for number in range(first_missing, level_number + 1):
+            merged_config = Level._merge_level_config(number, self.get_entry(number), silent)
+            previous_level_config = self._prepared_configs.get(number - 1)
+            prepared_config = Level._prepare_level_config(merged_config, number, previous_level_config)
+            if not silent:
+                logger.debug(f"Level {number} config: {prepared_config}")
+            self._prepared_configs[number] = prepared_config
+
+        return self._prepared_configs[level_number]
+
+    def level_properties(self, level_number):
+        level_properties = self._level_properties.get(level_number)
+        if level_properties is None:
+            level_properties = self._level_properties[level_number] = LevelProperties(self.resolve(level_number), level_number)
+        return level_properties
+
+    def resolved_configs(self, level_count):
+        # Prepared configs of levels 1..level_count with the per-level callables (default
+        # configs) evaluated, so they can be serialized
+        return [{key: _get_config_value(value, number) for key, value in self.resolve(number, silent=True).items()}
+                for number in range(1, level_count + 1)]
+
+    def preload(self, prepared_configs):
+        # Use the configs of levels 1..len(prepared_configs) resolved beforehand (compiled files)
+        for number, prepared_config in enumerate(prepared_configs, start=1):
+            self._prepared_configs[number] = prepared_config
+            self._level_properties.pop(number, None)
+
+
 class Wheel:
-    def __init__(self, center_x, center_y, text_width, text_height, stroke_color, font_color, json_data):
+    # Rendering engines: 'objects' builds a graph of Node/Level objects, 'columnar' flattens
+    # each structure into the parallel arrays of a ColumnarTree
+    ENGINES = ('objects', 'columnar')
+    # Output formats: the diagram generator the nodes are drawn with, from the same geometry
+    DIAGRAM_GENERATORS = {'drawio': DiagramGenerator, 'svg': SVGGenerator}
+    # Bound of the skeletons kept for the structures sharing a topology (see _shared_diagram),
+    # and of the topologies remembered to detect the shared ones
+    SKELETON_CACHE_BYTES = XMLRenderCache.DEFAULT_MAX_BYTES
+    MAX_SEEN_TOPOLOGIES = 4096
+
+    def __init__(self, center_x, center_y, text_width, text_height, stroke_color, font_color, json_data, engine='objects',
+                 xml_cache_bytes=0, label_fit=False, output_format='drawio'):
         self.center_x = center_x
         self.center_y = center_y
         self.text_width = text_width
@@ -305,29 +504,151 @@ class Wheel:
 
         if json_data.get('type') not in [ 'percentage_wheel', 'flavor_wheel' ]:
             raise ValueError("Unsupported wheel type. This generator can only handle 'flavor_wheel' or 'percentage_wheel' types.")
-
+        if engine not in Wheel.ENGINES:
+            raise ValueError(f"Unsupported engine '{engine}', expected one of {Wheel.ENGINES}")
+        if output_format not in Wheel.DIAGRAM_GENERATORS:
+            raise ValueError(f"Unsupported output format '{output_format}', expected one of {tuple(Wheel.DIAGRAM_GENERATORS)}")
+
+        self.engine = engine
+        # Auto-fit: shrink the font (or truncate) the labels that do not fit in their node
+        self.label_fit = label_fit
+        self.label_fitter = LabelFitter() if label_fit else None
+        self.output_format = output_format
+        self.wheel_type = json_data.get('type')
         self.structures_list = json_data['structures']
         self.json_levels_config = json_data.get('levels_config', [])
-        self.wheel_structures = []
-
-        # Create wheel structures
-        self._create_wheel_structures()
-
-    def _create_wheel_structures(self):
+        self.level_config_resolver = LevelConfigResolver(self.json_levels_config)
+
+        # Rendered XML of json_to_drawio, keyed by structure name, structure revision and geometry.
+        # Off by default (xml_cache_bytes=0): worth it for the long-lived callers re-exporting
+        # the same wheel object, not for the one-shot renders
+        self.xml_cache = XMLRenderCache(xml_cache_bytes)
+        self._structure_revisions = {}
+        # Names of the built structures handed out by get_structure: their nodes may be edited
+        # in place at any time, so their XML is never served from the xml_cache
+        self._exposed_structures = set()
+        # Skeletons of the rendered topologies, keyed by topology key (see topology.py)
+        self.skeleton_cache = XMLRenderCache(Wheel.SKELETON_CACHE_BYTES)
+        # Topology key -> True once a structure of that topology was rendered, False when its
+        # skeleton does not fit in the skeleton_cache
+        self._seen_topologies = OrderedDict()
+
+        # Structures are built on demand, the first time they are rendered (or loaded from the
+        # compiled file of load_compiled_wheel)
+        self.compiled_spec = None
+        self.structure_index = {}      # structure name -> JSON structure (the first one of that name)
+        self._built_structures = {}    # structure name -> built wheel structure
+        # False: the JSON of a structure is dropped as soon as it is built (or filled from a
+        # skeleton), for the callers rendering each structure once (see generate_file_streaming)
+        self.keep_structure_json = True
         for structure in self.structures_list:
-            structure_name = structure.get('name', 'Unnamed Structure')
-            logger.debug(f"========== Creating wheel structure '{structure_name}'")
-            # First, create nodes with their sub_nodes
+            self.structure_index.setdefault(Wheel._structure_name(structure), structure)
+
+    @staticmethod
+    def _structure_name(structure):
+        return structure.get('name', 'Unnamed Structure')
+
+    @property
+    def wheel_structures(self):
+        # All the built structures, in file order (builds the missing ones)
+        return [self.get_structure(name) for name in self.structure_index]
+
+    def get_structure(self, name):
+        # Built wheel structure of that name, built on first access. The caller may edit its
+        # nodes in place, so json_to_drawio stops caching its XML until replace_structure
+        self._exposed_structures.add(name)
+        return self._structure(name)
+
+    def _structure(self, name):
+        built_structure = self._built_structures.get(name)
+        if built_structure is None:
+            structure = self.structure_index.get(name)
+            if structure is None:
+                raise ValueError(f"'{name}' not found in the wheel structures.")
+            built_structure = self._built_structures[name] = self._build_structure(structure)
+        return built_structure
+
+    def _build_structure(self, structure):
+        structure_name = Wheel._structure_name(structure)
+        logger.debug(f"========== Creating wheel structure '{structure_name}'")
+        profiler.count('structures_built')
+        if self.compiled_spec is not None:
+            with profiler.phase('load_compiled'):
+                return {'name': structure_name, 'tree': self.compiled_spec.tree(structure_name)}
+        if self.engine == 'columnar':
+            tree = self._create_tree(structure)
+            logger.debug(f"Created wheel structure '{structure_name}' with {len(tree.level_ranges)} levels")
+            return {'name': structure_name, 'tree': tree}
+        # First, create nodes with their sub_nodes
+        with profiler.phase('create_nodes'):
             nodes = self._create_nodes(structure.get('nodes', []))
-            # Then, create levels based on the nodes
+        # Then, create levels based on the nodes
+        with profiler.phase('create_levels'):
             levels = self._create_levels_from_nodes(nodes)
-            # Assign angles to nodes
+        # Assign angles to nodes
+        with profiler.phase('assign_angles'):
             self._assign_node_angles(nodes, start_angle=0.0, end_angle=1.0)
-            # Get level configurations
+        # Get level configurations
+        with profiler.phase('levels_config'):
             self._get_levels_config(levels)
-            # Append the structure
-            self.wheel_structures.append({'name': structure_name, 'levels': levels})
-            logger.debug(f"Created wheel structure '{structure_name}' with {len(levels)} levels")
+        logger.debug(f"Created wheel structure '{structure_name}' with {len(levels)} levels")
+        return {'name': structure_name, 'levels': levels}
+
+    def replace_structure(self, structure):
+        # Replace a structure by its (changed) JSON definition, or add it if its name is new.
+        # It is rebuilt the next time it is rendered
+        name = Wheel._structure_name(structure)
+        previous_structure = self.structure_index.get(name)
+        if previous_structure is None:
+            self.structures_list.append(structure)
+        else:
+            index = next(index for index, entry in enumerate(self.structures_list) if entry is previous_structure)
+            self.structures_list[index] = structure
+        self.structure_index[name] = structure
+        self._built_structures.pop(name, None)
+        self._exposed_structures.discard(name)
+        self.invalidate_structure(name)
+
+    def release_structure(self, name):
+        # Forget a structure entirely (JSON, built structure and rendered XML), e.g. once a
+        # streaming ingestion has written it
+        structure = self.structure_index.pop(name, None)
+        if structure is not None:
+            index = next(index for index, entry in enumerate(self.structures_list) if entry is structure)
+            del self.structures_list[index]
+        self._built_structures.pop(name, None)
+        self._exposed_structures.discard(name)
+        self.invalidate_structure(name)
+
+    def _drop_structure_json(self, name):
+        # Keep only the name of the JSON structure (which release_structure still finds)
+        structure = self.structure_index.get(name)
+        if self.keep_structure_json or structure is None:
+            return
+        index = next(index for index, entry in enumerate(self.structures_list) if entry is structure)
+        self.structures_list[index] = self.structure_index[name] = {'name': name}
+
+    def invalidate_structure(self, name=None):
+        # Forget the rendered XML of a structure (of all structures by default). Every mutation
+        # path goes through here: replace_structure and release_structure call it, and the
+        # structures that can be edited in place (see get_structure) bypass the xml_cache
+        if name is None:
+            self._structure_revisions.clear()
+            self.xml_cache.clear()
+            return
+        self._structure_revisions[name] = self._structure_revisions.get(name, 0) + 1
+        self.xml_cache.discard(lambda key: key[0] == name)
+
+    def _create_tree(self, structure):
+        # Columnar engine: flatten the nodes, assign their angles and prepare the level configurations
+        with profiler.phase('create_tree'):
+            tree = ColumnarTree.from_nodes_data(structure.get('nodes', []), RESOLVED_PROPERTY_NAMES)
+        with profiler.phase('assign_angles'):
+            self._assign_tree_angles(tree)
+        with profiler.phase('levels_config'):
+            if tree.level_ranges:
+                self.level_config_resolver.resolve(len(tree.level_ranges))
+        return tree
 
     def _create_nodes(self, nodes_data, parent_node=None):
         nodes = []
@@ -340,7 +661,8 @@ class Wheel:
             if sub_nodes_data:
                 node.sub_nodes = self._create_nodes(sub_nodes_data, parent_node=node)
             nodes.append(node)
-            logger.debug(f"Created node '{node.label}' with {len(node.sub_nodes)} sub-nodes")
+            if node_tracing:
+                logger.debug("Created node '%s' with %d sub-nodes", node.label, len(node.sub_nodes))
         return nodes
 
 
@@ -349,10 +671,11 @@ class Wheel:
         def traverse(node, level_number, previous_level=None, parent_node=None):
             if level_number not in levels_dict:
                 levels_dict[level_number] = Level(level_number=level_number, previous_level=previous_level)
-                logger.debug(f"Created level {level_number}")
+                logger.debug("Created level %d", level_number)
             level = levels_dict[level_number]
             level.add_node(node)
-            logger.debug(f"Added node '{node.label}' to level {level_number}")
+            if node_tracing:
+                logger.debug("Added node '%s' to level %d", node.label, level_number)
             node.parent_node = parent_node
             for child_node in node.sub_nodes:
                 traverse(child_node, level_number + 1, previous_level=level, parent_node=node)
@@ -364,32 +687,191 @@ class Wheel:
 
     def _get_levels_config(self, levels: List[Level]):
         for level in levels:
-            level.get_level_config(self.json_levels_config)
+            level.get_level_config(self.json_levels_config, resolver=self.level_config_resolver)
 
 
-    def json_to_drawio(self, name):
-        logger.debug(f"Generating DrawIO for: {name}")
-        # Access the wheel structure for the specified name
-        structure = next((entry for entry in self.wheel_structures if entry['name'] == name), None)
-        if not structure:
+    def structure_cache_key(self, name):
+        # Content hash of everything the rendered output of a structure depends on
+        structure = self.structure_index.get(name)
+        if structure is None:
             raise ValueError(f"'{name}' not found in the wheel structures.")
-        levels = structure['levels']
-
-        # Initialize the Diagram Generator
-        diagram = DiagramGenerator()
-
-        # Start processing levels
-        for level in levels:
-            self._process_level(level=level, diagram=diagram)
-
-        # Generate and return the XML content
-        xml_content = diagram.generate_xml(name)
+        geometry = (self.center_x, self.center_y, self.text_width, self.text_height, self.stroke_color, self.font_color)
+        code_version = source_fingerprint(os.path.abspath(__file__), os.path.abspath(drawio.__file__),
+                                          os.path.abspath(callout_layout.__file__), os.path.abspath(text_metrics.__file__),
+                                          os.path.abspath(svg.__file__), os.path.abspath(angle_rules.__file__))
+        return RenderCache.make_key(code_version, self.wheel_type, structure, self.json_levels_config, geometry,
+                                    self.label_fit, self.output_format)
+
+    def json_to_drawio(self, name, compressed=False):
+        # Generate and return the XML content; unchanged structures are served from the xml_cache.
+        # compressed: deflated, base64-encoded diagram payload (see DiagramGenerator.iter_xml)
+        if name in self._exposed_structures:
+            diagram = self._render_diagram(name)
+            with profiler.phase('generate_xml'):
+                return diagram.generate_xml(name, compressed)
+        cache_key = (name, self._structure_revisions.get(name, 0), self.center_x, self.center_y,
+                     self.text_width, self.text_height, self.stroke_color, self.font_color, self.label_fit, self.output_format, compressed)
+        xml_content = self.xml_cache.get(cache_key)
+        if xml_content is not None:
+            profiler.count('xml_cache_hits')
+            return xml_content
+
+        diagram = self._render_diagram(name)
+        with profiler.phase('generate_xml'):
+            xml_content = diagram.generate_xml(name, compressed)
+        self.xml_cache.put(cache_key, xml_content)
         return xml_content
 
+    def write_drawio(self, name, output_filename, spool_size=DiagramGenerator.DEFAULT_SPOOL_SIZE, compression='none'):
+        # Streaming variant of json_to_drawio: the cells are spooled while rendering and then
+        # written chunk by chunk (and compressed on the fly, see COMPRESSION_MODES). Rendering
+        # happens before opening the file, so a failing structure does not leave a partial file behind
+        diagram = self._render_diagram(name, streaming=True, spool_size=spool_size)
+        try:
+            with profiler.phase('write_xml'), open_output_file(output_filename, compression) as file:
+                diagram.write_xml(name, file, compressed=compression == 'deflate')
+        finally:
+            diagram.close()
+
+    def write_drawio_page(self, name, file, compressed=False, streaming=True, spool_size=DiagramGenerator.DEFAULT_SPOOL_SIZE):
+        # Write the structure as one <diagram> page of a multi-page document (see render_pages)
+        diagram = self._render_diagram(name, streaming=streaming, spool_size=spool_size)
+        try:
+            with profiler.phase('write_xml'):
+                diagram.write_page(name, file, compressed)
+        finally:
+            diagram.close()
+
+    def iter_drawio(self, name, spool_size=DiagramGenerator.DEFAULT_SPOOL_SIZE, compressed=False):
+        # Chunk generator variant of json_to_drawio
+        diagram = self._render_diagram(name, streaming=True, spool_size=spool_size)
+        try:
+            yield from diagram.iter_xml(name, compressed)
+        finally:
+            diagram.close()
+
+    def _render_diagram(self, name, **diagram_options):
+        diagram = self._shared_diagram(name, **diagram_options)
+        if diagram is not None:
+            return diagram
+        logger.debug(f"Generating DrawIO for: {name}")
+        # Access (and build, the first time) the wheel structure for the specified name
+        structure = self._structure(name)
+        self._drop_structure_json(name)
+        # Initialize the Diagram Generator of the output format
+        diagram = Wheel.DIAGRAM_GENERATORS[self.output_format](**diagram_options)
 
-
-    def _process_level(self, level, diagram=None):
-        logger.debug(f"Processing Level {level.level_number}, nodes: {[node.label for node in level.nodes]}")
+        # Start processing levels
+        profiler.count('structures_rendered')
+        try:
+            with profiler.phase('process_levels'):
+                self._process_structure_levels(structure, diagram)
+        except Exception:
+            diagram.close()
+            raise
+        return diagram
+
+    def _shared_diagram(self, name, **diagram_options):
+        """
+        Diagram of a structure filled from the skeleton of its topology: once a topology is
+        seen a second time, its skeleton is rendered and cached, and the next structures of
+        that topology (e.g. the translations of a wheel) skip building, angles, config
+        resolution and cell rendering. The first structure of a topology is rendered normally
+        (streamed), so the structures that share nothing pay nothing.
+        Returns None when the structure is rendered normally: SVG output (its view box depends
+        on the label widths), fitted labels (their font size depends on the label), compiled
+        structures, node tracing (logging the labels) and structures already built, whose
+        nodes may have been modified in place.
+        """
+        if (self.output_format != 'drawio' or self.label_fitter is not None or self.compiled_spec is not None
+                or node_tracing or name in self._built_structures):
+            return None
+        structure = self.structure_index.get(name)
+        topology = split_labels(structure) if structure is not None else None
+        if topology is None:
+            return None
+        topology_key, labels = topology
+        skeleton = self.skeleton_cache.get(topology_key)
+        if skeleton is None:
+            shared = self._seen_topologies.get(topology_key)
+            if shared is None:
+                # First structure of this topology
+                self._seen_topologies[topology_key] = True
+                if len(self._seen_topologies) > Wheel.MAX_SEEN_TOPOLOGIES:
+                    self._seen_topologies.popitem(last=False)
+                return None
+            if not shared:
+                return None
+            skeleton = self._render_skeleton(structure, diagram_options.get('spool_size', DiagramGenerator.DEFAULT_SPOOL_SIZE))
+            if skeleton is None:
+                self._seen_topologies[topology_key] = False
+                return None
+            if skeleton.size > self.skeleton_cache.max_bytes:
+                self._seen_topologies[topology_key] = False  # Used for this structure only
+            else:
+                self.skeleton_cache.put(topology_key, skeleton, skeleton.size)
+        else:
+            # Same nodes and cells per level as the render of the skeleton, counted per structure
+            profiler.count('topology_shared')
+            for level_number, nodes, cells in skeleton.level_counts:
+                profiler.record_level(level_number, nodes, cells)
+        with profiler.phase('fill_labels'):
+            diagram = FilledDiagram(skeleton, labels, **diagram_options)
+        self._drop_structure_json(name)
+        return diagram
+
+    def _render_skeleton(self, structure, spool_size=DiagramGenerator.DEFAULT_SPOOL_SIZE):
+        logger.debug(f"Generating DrawIO skeleton for: {Wheel._structure_name(structure)}")
+        diagram = DiagramGenerator(streaming=True, spool_size=spool_size)
+        try:
+            built_structure = self._build_structure(slotted_structure(structure))
+            profiler.count('structures_rendered')
+            with profiler.phase('process_levels'):
+                level_counts = self._process_structure_levels(built_structure, diagram)
+            with profiler.phase('generate_xml'):
+                return Skeleton(diagram.iter_graph_model(), level_counts)
+        except Exception as e:
+            # Rendered normally instead, to report the error with the real labels
+            logger.debug(f"No skeleton for {Wheel._structure_name(structure)}: {e}")
+            return None
+        finally:
+            diagram.close()
+
+    def _process_structure_levels(self, structure, diagram):
+        # The callout labels of all the levels share one layout, so they avoid each other too.
+        # Returns the (level_number, nodes, cells) counts of the levels, as recorded in the profiler
+        layout = self._new_callout_layout()
+        level_counts = []
+        if 'tree' in structure:
+            tree = structure['tree']
+            for level_number in range(1, len(tree.level_ranges) + 1):
+                first_cell_id = diagram.id_counter
+                self._process_tree_level(tree, level_number, diagram, layout)
+                first_index, end_index = tree.level_ranges[level_number - 1]
+                level_counts.append((level_number, end_index - first_index, diagram.id_counter - first_cell_id))
+        else:
+            for level in structure['levels']:
+                first_cell_id = diagram.id_counter
+                self._process_level(level=level, diagram=diagram, callout_layout=layout)
+                level_counts.append((level.level_number, len(level.nodes), diagram.id_counter - first_cell_id))
+        for level_number, nodes, cells in level_counts:
+            profiler.record_level(level_number, nodes, cells)
+        if layout.moved or layout.overlapping:
+            logger.debug("Callout layout: moved %d labels, %d left overlapping", layout.moved, layout.overlapping)
+            profiler.count('callouts_moved', layout.moved)
+        return level_counts
+
+    def _new_callout_layout(self):
+        return CalloutLayout(self.center_x, self.center_y, self.text_width, self.text_height)
+
+
+
+    def _process_level(self, level, diagram=None, callout_layout=None):
+        if logger.isEnabledFor(logging.DEBUG):
+            if node_tracing:
+                logger.debug("Processing Level %d, nodes: %s", level.level_number, [node.label for node in level.nodes])
+            else:
+                logger.debug("Processing Level %d, nodes: %d", level.level_number, len(level.nodes))
 
         level_config = level.level_config
         if not level_config:
@@ -399,69 +881,27 @@ class Wheel:
         # Process nodes in order of their start_angle
         nodes_in_order = sorted(level.nodes, key=lambda n: n.start_angle if n.start_angle is not None else 0)
 
+        # Get radii from level configuration
+        inner_radius = level_config['inner_radius']
+        outer_radius = level_config['outer_radius']
+        level_stats = Counter()
+        level_properties = self.level_config_resolver.level_properties(level.level_number)
+
         for node in nodes_in_order:
             # Resolve properties for the node
-            node.resolve_properties(level_config, level.level_number)
+            node.resolve_properties(level_config, level.level_number, level_properties)
 
             start_angle = node.start_angle
             end_angle = node.end_angle
             resolved_properties = node.resolved_properties
 
-            # Extract resolved properties
-            fill_color = resolved_properties['shape_color']
-            shape_opacity = resolved_properties['shape_opacity']
-            font_color = resolved_properties['text_color']
-            text_opacity = resolved_properties['text_opacity']
-            font_size = resolved_properties['font_size']
-            rotation_option = resolved_properties['text_rotation']
-            placement_option = resolved_properties['text_placement']
-
-            # Get radii from level configuration
-            inner_radius = level_config['inner_radius']
-            outer_radius = level_config['outer_radius']
-            arc_width = 1 - (inner_radius / outer_radius) if level.level_number > 1 else 1
-
-            # Draw shapes and capture the shape ID
-            shape_id = None
             if start_angle is None or end_angle is None:
                 # Skip the node
-                logger.info(f"Skipping Node [level:{level.level_number} |label: {node.label}] start_angle= {start_angle}, end_angle= {end_angle}")
+                level_stats['skipped'] += 1
+                if node_tracing:
+                    logger.info("Skipping Node [level:%d |label: %s] start_angle= %s, end_angle= %s", level.level_number, node.label, start_angle, end_angle)
                 continue
 
-            angle_diff = (end_angle - start_angle) % 1.0
-            if angle_diff == 0 or angle_diff == 1.0:
-                # Full circle or annulus
-                if level.level_number == 1:
-                    logger.info(f" Drawing Node [level:{level.level_number} |label: {node.label}]: Circle ")
-                    shape_id = diagram.add_circle(
-                        self.center_x, self.center_y, outer_radius,
-                        fill_color, self.stroke_color, shape_opacity
-                    )
-                else:
-                    logger.info(f" Drawing Node [level:{level.level_number} |label: {node.label}]: Annulus ")
-                    shape_id = diagram.add_annulus(
-                        self.center_x, self.center_y, outer_radius, inner_radius,
-                        fill_color, self.stroke_color, shape_opacity
-                    )
-            else:
-                # Slices
-                if level.level_number == 1:
-                    logger.info(f" Drawing Node [level:{level.level_number} |label: {node.label}]: Pie Slice    : {start_angle} - {end_angle}")
-                    shape_id = diagram.add_pie_slice(
-                        self.center_x, self.center_y, outer_radius,
-                        start_angle, end_angle,
-                        fill_color, self.stroke_color, shape_opacity
-                    )
-                else:
-                    logger.info(f" Drawing Node [level:{level.level_number} |label: {node.label}]: Annulus Slice : {start_angle} - {end_angle}")
-                    shape_id = diagram.add_annulus_slice(
-                        self.center_x, self.center_y, outer_radius, arc_width,
-                        start_angle, end_angle,
-                        fill_color, self.stroke_color, shape_opacity
-                    )
-
-            node.shape_id = shape_id  # Store the shape ID
-
             # Calculate mid-angle
             mid_angle = Wheel.calculate_mid_angle(start_angle, end_angle)   
             mid_angle_deg = (mid_angle * 360.0) - 90.0
@@ -473,72 +913,227 @@ class Wheel:
             cos_theta = math.cos(theta_rad)
             sin_theta = math.sin(theta_rad)
 
-            # The shape is centered at (x_shape_center, y_shape_center)
-            # For shapes centered at the diagram center:
-            x_shape_center = self.center_x
-            y_shape_center = self.center_y
+            # Compute the position of the text
+            x_text, y_text = self.compute_text_position_option(
+                resolved_properties.text_placement, self.center_x, self.center_y,
+                inner_radius, outer_radius, mid_angle_deg,
+                self.text_width, self.text_height, level.level_number
+            )
+            if resolved_properties.text_placement == 'callout':
+                if callout_layout is None:
+                    callout_layout = self._new_callout_layout()
+                x_text, y_text = callout_layout.place(level.level_number, mid_angle_deg, x_text, y_text)
+
+            node.shape_id, node.text_id = self._draw_node(
+                diagram, level.level_number, node.label, start_angle, end_angle,
+                inner_radius, outer_radius, resolved_properties,
+                mid_angle_deg, cos_theta, sin_theta, x_text, y_text, level_stats
+            )
 
-            # Compute exitDx and exitDy
-            radius = outer_radius  # For the outer edge of the shape
-            exitDx = radius * cos_theta
-            exitDy = radius * sin_theta
+        Wheel._log_level_summary(level.level_number, level_stats)
+
+    @staticmethod
+    def _log_level_summary(level_number, level_stats):
+        # Aggregate replacement of the per-node messages, when node tracing is disabled
+        if not node_tracing and logger.isEnabledFor(logging.INFO):
+            drawn = sum(count for shape, count in level_stats.items() if shape != 'skipped')
+            shapes = ", ".join(f"{count} {shape}" for shape, count in sorted(level_stats.items()) if shape != 'skipped')
+            logger.info("Level %d: drew %d nodes (%s), skipped %d", level_number, drawn, shapes, level_stats['skipped'])
+
+    def _draw_node(self, diagram, level_number, label, start_angle, end_angle, inner_radius, outer_radius,
+                   resolved_properties, mid_angle_deg, cos_theta, sin_theta, x_text, y_text, level_stats=None):
+        # Draw the shape, the text and the optional callout line of a node whose geometry is computed.
+        # Counts the drawn shape kinds in level_stats (if given).
+        # Returns the (shape_id, text_id) of the drawio elements
+        # Extract resolved properties
+        fill_color = resolved_properties.shape_color
+        shape_opacity = resolved_properties.shape_opacity
+        font_color = resolved_properties.text_color
+        text_opacity = resolved_properties.text_opacity
+        font_size = resolved_properties.font_size
+        rotation_option = resolved_properties.text_rotation
+        placement_option = resolved_properties.text_placement
+
+        arc_width = 1 - (inner_radius / outer_radius) if level_number > 1 else 1
+
+        # Draw shapes and capture the shape ID
+        shape_id = None
+        angle_diff = (end_angle - start_angle) % 1.0
+        if angle_diff == 0 or angle_diff == 1.0:
+            # Full circle or annulus
+            if level_number == 1:
+                shape_kind = 'circle'
+                if node_tracing:
+                    logger.info(" Drawing Node [level:%d |label: %s]: Circle ", level_number, label)
+                shape_id = diagram.add_circle(
+                    self.center_x, self.center_y, outer_radius,
+                    fill_color, self.stroke_color, shape_opacity
+                )
+            else:
+                shape_kind = 'annulus'
+                if node_tracing:
+                    logger.info(" Drawing Node [level:%d |label: %s]: Annulus ", level_number, label)
+                shape_id = diagram.add_annulus(
+                    self.center_x, self.center_y, outer_radius, inner_radius,
+                    fill_color, self.stroke_color, shape_opacity
+                )
+        else:
+            # Slices
+            if level_number == 1:
+                shape_kind = 'pie slice'
+                if node_tracing:
+                    logger.info(" Drawing Node [level:%d |label: %s]: Pie Slice    : %s - %s", level_number, label, start_angle, end_angle)
+                shape_id = diagram.add_pie_slice(
+                    self.center_x, self.center_y, outer_radius,
+                    start_angle, end_angle,
+                    fill_color, self.stroke_color, shape_opacity
+                )
+            else:
+                shape_kind = 'annulus slice'
+                if node_tracing:
+                    logger.info(" Drawing Node [level:%d |label: %s]: Annulus Slice : %s - %s", level_number, label, start_angle, end_angle)
+                shape_id = diagram.add_annulus_slice(
+                    self.center_x, self.center_y, outer_radius, arc_width,
+                    start_angle, end_angle,
+                    fill_color, self.stroke_color, shape_opacity
+                )
 
-            # Format exitDx and exitDy as strings with 3 decimal places
-            exitDx_str = f"{exitDx:.3f}"
-            exitDy_str = f"{exitDy:.3f}"
+        if level_stats is not None:
+            level_stats[shape_kind] += 1
 
-            # Set exitX and exitY to 0.5 (center of the shape)
-            exitX_str = "0.5"
-            exitY_str = "0.5"
+        # The shape is centered at (x_shape_center, y_shape_center)
+        # For shapes centered at the diagram center:
+        x_shape_center = self.center_x
+        y_shape_center = self.center_y
 
-            # Compute rotation and position
-            rotation = self.compute_text_rotation_option(rotation_option, mid_angle_deg, placement_option)
-            x_text, y_text = self.compute_text_position_option(
-                placement_option, self.center_x, self.center_y,
-                inner_radius, outer_radius, mid_angle_deg,
-                self.text_width, self.text_height, level.level_number
+        # Compute exitDx and exitDy
+        radius = outer_radius  # For the outer edge of the shape
+        exitDx = radius * cos_theta
+        exitDy = radius * sin_theta
+
+        # Format exitDx and exitDy as strings with 3 decimal places
+        exitDx_str = f"{exitDx:.3f}"
+        exitDy_str = f"{exitDy:.3f}"
+
+        # Set exitX and exitY to 0.5 (center of the shape)
+        exitX_str = "0.5"
+        exitY_str = "0.5"
+
+        # Compute rotation
+        rotation = self.compute_text_rotation_option(rotation_option, mid_angle_deg, placement_option)
+
+        if self.label_fitter is not None:
+            label, font_size = self._fit_label(label, font_size, start_angle, end_angle, inner_radius, outer_radius,
+                                               placement_option, rotation_option)
+
+        # Add text element and capture its ID
+        text_id = diagram.add_text_element(
+            label, x_text, y_text,
+            self.text_width, self.text_height, rotation,
+            font_size, font_color, text_opacity
+        )
+
+        # If placement is "callout", draw a leader line
+        if placement_option == 'callout':
+            # Start and end points for the line
+            x_start = x_shape_center + radius * cos_theta
+            y_start = y_shape_center + radius * sin_theta
+            x_end = x_text + (self.text_width / 2)
+            y_end = y_text + (self.text_height / 2)
+
+            # Define the style dictionary with connection parameters
+            style_dict = {
+                "strokeColor": "#000000",
+                "strokeWidth": "1",
+                "endArrow": "none",
+                "exitX": exitX_str,
+                "exitY": exitY_str,
+                "exitDx": exitDx_str,
+                "exitDy": exitDy_str,
+                "exitPerimeter": "0",  # Not using perimeter calculation
+                "entryPerimeter": "0"
+            }
+
+            # Add the line
+            diagram.add_line(
+                source_id=shape_id,
+                target_id=text_id,
+                x1=x_start,
+                y1=y_start,
+                x2=x_end,
+                y2=y_end,
+                style_dict=style_dict
             )
 
-            # Add text element and capture its ID
-            text_id = diagram.add_text_element(
-                node.label, x_text, y_text,
-                self.text_width, self.text_height, rotation,
-                font_size, font_color, text_opacity
+        return shape_id, text_id
+
+    def _fit_label(self, label, font_size, start_angle, end_angle, inner_radius, outer_radius,
+                   placement_option, rotation_option):
+        # Space available to the label of a node, along and across the text, for the label_fitter
+        if placement_option in ('callout', 'outside'):
+            # Outside the wheel, only the text box bounds the label
+            length, thickness = self.text_width, self.text_height
+        else:
+            angle_span = (end_angle - start_angle) % 1.0 or 1.0
+            if placement_option == 'inside_top':
+                r_text = outer_radius - self.text_height / 2
+            else:
+                r_text = (inner_radius + outer_radius) / 2
+            arc_length = 2 * math.pi * max(r_text, 0) * angle_span
+            radial_depth = outer_radius - inner_radius
+            if rotation_option in ('perpendicular', 'perpendicular_upright'):
+                length, thickness = arc_length, radial_depth
+            elif rotation_option in ('horizontal', 'vertical') or isinstance(rotation_option, dict):
+                # Not aligned with the slice: only the smallest side is sure to be available
+                length = thickness = min(arc_length, radial_depth)
+            else:
+                length, thickness = radial_depth, arc_length  # Radial text (the default)
+        return self.label_fitter.fit(label, font_size, length, thickness)
+
+    def _process_tree_level(self, tree, level_number, diagram, callout_layout=None):
+        # Columnar engine equivalent of _process_level: the geometry of the level is computed
+        # in one batch, then the nodes are drawn in the same order as _process_level
+        level_config = self.level_config_resolver.resolve(level_number)
+        first_index, end_index = tree.level_ranges[level_number - 1]
+        logger.debug("Processing Level %d, nodes: %d", level_number, end_index - first_index)
+
+        parents = tree.parents
+        resolved = tree.resolved_properties
+        node_styles = tree.node_styles
+        level_properties = self.level_config_resolver.level_properties(level_number)
+        for index in range(first_index, end_index):
+            parent_index = parents[index]
+            resolved[index] = level_properties.resolve(
+                node_styles[index], resolved[parent_index] if parent_index >= 0 else None
             )
-            node.text_id = text_id  # Store the text ID
-
-            # If placement is "callout", draw a leader line
-            if placement_option == 'callout':
-                # Start and end points for the line
-                x_start = x_shape_center + radius * cos_theta
-                y_start = y_shape_center + radius * sin_theta
-                x_end = x_text + (self.text_width / 2)
-                y_end = y_text + (self.text_height / 2)
-
-                # Define the style dictionary with connection parameters
-                style_dict = {
-                    "strokeColor": "#000000",
-                    "strokeWidth": "1",
-                    "endArrow": "none",
-                    "exitX": exitX_str,
-                    "exitY": exitY_str,
-                    "exitDx": exitDx_str,
-                    "exitDy": exitDy_str,
-                    "exitPerimeter": "0",  # Not using perimeter calculation
-                    "entryPerimeter": "0"
-                }
-
-                # Add the line
-                diagram.add_line(
-                    source_id=shape_id,
-                    target_id=text_id,
-                    x1=x_start,
-                    y1=y_start,
-                    x2=x_end,
-                    y2=y_end,
-                    style_dict=style_dict
-                )
-                
+
+        inner_radius = level_config['inner_radius']
+        outer_radius = level_config['outer_radius']
+        drawn_indices = tree.level_draw_order(level_number)
+        geometry = tree.level_geometry(
+            drawn_indices, [resolved[index].text_placement for index in drawn_indices],
+            inner_radius, outer_radius, self.center_x, self.center_y,
+            self.text_width, self.text_height, level_number
+        )
+
+        start_angles = tree.start_angles
+        end_angles = tree.end_angles
+        labels = tree.labels
+        level_stats = Counter(skipped=(end_index - first_index) - len(drawn_indices))
+        for position, index in enumerate(drawn_indices):
+            mid_angle_deg, cos_theta, sin_theta, x_text, y_text = geometry[position]
+            if resolved[index].text_placement == 'callout':
+                if callout_layout is None:
+                    callout_layout = self._new_callout_layout()
+                x_text, y_text = callout_layout.place(level_number, mid_angle_deg, x_text, y_text)
+            self._draw_node(
+                diagram, level_number, labels[index], start_angles[index], end_angles[index],
+                inner_radius, outer_radius, resolved[index],
+                mid_angle_deg, cos_theta, sin_theta, x_text, y_text, level_stats
+            )
+
+        Wheel._log_level_summary(level_number, level_stats)
+
 
 
     def compute_text_rotation_option(self, rotation_option, mid_angle_deg, placement_option):
@@ -585,8 +1180,7 @@ class Wheel:
             x_text = center_x + r_text * math.cos(math.radians(mid_angle_deg)) - text_width / 2
             y_text = center_y + r_text * math.sin(math.radians(mid_angle_deg)) - text_height / 2
 
-            # TODO: Optional: Adjust positions to avoid overlap (leveling)
-            # For now, we'll leave it as is
+            # Overlaps between callout labels are resolved afterwards, by the CalloutLayout of the structure
 
             return x_text, y_text
         else:
@@ -657,150 +1251,729 @@ class Wheel:
 
 
 class FlavorWheel(Wheel):
-    def __init__(self, center_x, center_y, text_width, text_height, stroke_color, font_color, json_data):
+    def __init__(self, center_x, center_y, text_width, text_height, stroke_color, font_color, json_data, engine='objects',
+                 xml_cache_bytes=0, label_fit=False, output_format='drawio'):
         logger.debug("Initializing Flavor Wheel with provided JSON data")
         if json_data.get('type') != 'flavor_wheel':
             raise ValueError("Unsupported wheel type. This generator can only handle 'flavor_wheel' type.")
 
-        super().__init__(center_x, center_y, text_width, text_height, stroke_color, font_color, json_data)
-
-    def _assign_node_angles(self, nodes, start_angle, end_angle):
-        total_angle = (end_angle - start_angle) % 1.0
-        if total_angle <= 0:
-            total_angle += 1.0  # Ensure positive total angle
-
-        # First, compute the total number of leaf nodes under the nodes
-        total_leaves = sum(self._count_leaves(node) for node in nodes)
-        current_angle = start_angle
+        super().__init__(center_x, center_y, text_width, text_height, stroke_color, font_color, json_data, engine,
+                         xml_cache_bytes, label_fit, output_format)
 
-        for node in nodes:
-            node_leaves = self._count_leaves(node)
-            angle_span = total_angle * (node_leaves / total_leaves)
-            node.start_angle = current_angle
-            node.end_angle = (current_angle + angle_span) % 1.0
+    def _assign_tree_angles(self, tree):
+        tree.assign_leaf_angles(start_angle=0.0, end_angle=1.0)
 
-            # Recursively assign angles to sub_nodes
-            if node.sub_nodes:
-                self._assign_node_angles(node.sub_nodes, node.start_angle, node.end_angle)
-            current_angle = node.end_angle
+    def _assign_node_angles(self, nodes, start_angle, end_angle):
+        # First, compute the (weighted) leaf count of every node in a single post-order pass
+        self._compute_leaf_counts(nodes)
+
+        # Then assign the angles level by level, without recursion
+        pending_groups = [(nodes, start_angle, end_angle)]
+        while pending_groups:
+            sibling_nodes, group_start_angle, group_end_angle = pending_groups.pop()
+            spans = angle_rules.leaf_spans([node.leaf_count for node in sibling_nodes], group_start_angle, group_end_angle)
+            for node, span in zip(sibling_nodes, spans):
+                if span is None:
+                    continue  # Zero weight: not drawn, neither are its sub_nodes (like a 0% node)
+                node.start_angle, node.end_angle = span
+
+                # Assign angles to sub_nodes once this group is done
+                if node.sub_nodes:
+                    pending_groups.append((node.sub_nodes, node.start_angle, node.end_angle))
 
-    def _count_leaves(self, node):
-        if not node.sub_nodes:
-            return 1
-        else:
-            return sum(self._count_leaves(child) for child in node.sub_nodes)
+    @staticmethod
+    def _compute_leaf_counts(nodes):
+        """
+        Store on each node the number of leaves under it, where a leaf counts
+        for its optional 'weight' (1 by default). Iterative post-order traversal.
+        """
+        stack = [(node, False) for node in reversed(nodes)]
+        while stack:
+            node, children_done = stack.pop()
+            if not node.sub_nodes:
+                node.leaf_count = angle_rules.leaf_weight(node.weight, node.label)
+            elif children_done:
+                node.leaf_count = sum(child.leaf_count for child in node.sub_nodes)
+            else:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(node.sub_nodes))
 
 
 class PercentageWheel(Wheel):
-    def __init__(self, center_x, center_y, text_width, text_height, stroke_color, font_color, json_data):
+    def __init__(self, center_x, center_y, text_width, text_height, stroke_color, font_color, json_data, engine='objects',
+                 xml_cache_bytes=0, label_fit=False, output_format='drawio'):
         logger.debug("Initializing Percentage Wheel with provided JSON data")
         if json_data.get('type') != 'percentage_wheel':
             raise ValueError("Unsupported wheel type. This generator can only handle 'percentage_wheel' type.")
 
-        super().__init__(center_x, center_y, text_width, text_height, stroke_color, font_color, json_data)
+        super().__init__(center_x, center_y, text_width, text_height, stroke_color, font_color, json_data, engine,
+                         xml_cache_bytes, label_fit, output_format)
 
+    def _assign_tree_angles(self, tree):
+        tree.assign_percentage_angles(start_angle=0.0, end_angle=1.0)
 
-    def _assign_node_angles(self, nodes, start_angle, end_angle):
-        total_angle = (end_angle - start_angle) % 1.0
-        if total_angle <= 0:
-            total_angle += 1.0  # Ensure positive total angle
 
+    def _assign_node_angles(self, nodes, start_angle, end_angle):
         # Firt calculate the percentages of the Nodes 
         #========================================
-        total_specified_percentage = sum(node.percentage for node in nodes if node.percentage and node.percentage > 0)
-        unspecified_nodes = [node for node in nodes if node.percentage is None ]
-        total_unspecified_nodes = len(unspecified_nodes)
-        if total_specified_percentage > 100:
-            raise ValueError(f"Total specified percentage exceeds 100%")
-
-        remaining_percentage = 100 - total_specified_percentage
-
-        current_angle = start_angle
-
-        for node in nodes:
-            if node.label == 'Level2_Node4':
-                logger.warning(f"Node '{node.label}' has percentage {node.percentage}")
-            if node.percentage is None :
-                logger.debug(f"Node '{node.label}' has no percentage specified. Assigning percentage based on remaining percentage {remaining_percentage} and total unspecified nodes {total_unspecified_nodes}")
-                node.percentage = remaining_percentage / total_unspecified_nodes if total_unspecified_nodes > 0 else 0
-
+        percentages = angle_rules.resolve_percentages([node.percentage for node in nodes])
+        for node, percentage in zip(nodes, percentages):
+            if node.percentage is None:
+                if node_tracing:
+                    logger.debug("Node '%s' has no percentage specified. Assigning its share %s of the remaining percentage", node.label, percentage)
+                node.percentage = percentage
 
         # Second assign the angles
         #========================================
+        for node, span in zip(nodes, angle_rules.percentage_spans(percentages, start_angle, end_angle)):
+            if span is None:
+                if node_tracing:
+                    logger.debug("Skipping node '%s' at this level due to its 0%% percentage or a 100%% sibling", node.label)
+                continue
+            node.start_angle, node.end_angle = span
+            if node_tracing:
+                logger.debug("Assigned angles to node '%s': start_angle=%s, end_angle=%s", node.label, node.start_angle, node.end_angle)
 
-        # Check if any node has 100% percentage
-        nodes_with_100_percent = [node for node in nodes if node.percentage == 100]
-        if nodes_with_100_percent:
-            # Only assign angles to the node with 100% percentage
-            node = nodes_with_100_percent[0] 
-            node.start_angle = start_angle
-            node.end_angle = end_angle
-            logger.debug(f"Assigned angles to node '{node.label}' (100%): start_angle={node.start_angle}, end_angle={node.end_angle}")
             # Recursively assign angles to sub_nodes
             if node.sub_nodes:
                 self._assign_node_angles(node.sub_nodes, node.start_angle, node.end_angle)
-            # Other nodes will not be assigned angles
-            for other_node in nodes:
-                if other_node != node:
-                    logger.debug(f"Skipping node '{other_node.label}' at this level due to 100% node '{node.label}'")
-            return
+
+
+
+# Geometry used by the CLI: center_x, center_y, text_width, text_height, stroke_color, font_color
+DEFAULT_WHEEL_ARGS = (320, 290, 80, 30, '#808080', '#000000')
+
+
+def load_json_file(input_filepath):
+    with profiler.phase('json_load'), open(input_filepath, 'r', encoding='utf-8') as json_file:
+        json_data = json.load(json_file)
+    logger.info(f"Successfully loaded JSON data from {input_filepath}")
+    return json_data
+
+
+def create_wheel(json_data, wheel_args=DEFAULT_WHEEL_ARGS, **wheel_options):
+    # Dynamically choose the wheel class based on 'type' in JSON
+    wheel_type = json_data.get('type')
+    if wheel_type == 'flavor_wheel':
+        return FlavorWheel(*wheel_args, json_data, **wheel_options)
+    elif wheel_type == 'percentage_wheel':
+        return PercentageWheel(*wheel_args, json_data, **wheel_options)
+    raise ValueError(f"Unsupported wheel type: {wheel_type}")
+
+
+def render_xml(json_data, structure_name=None, wheel_args=DEFAULT_WHEEL_ARGS, engine='objects', label_fit=False,
+               output_format='drawio'):
+    """
+    Library entry point: render one structure of a wheel spec (a parsed JSON dict) and return
+    the drawio (or SVG) document as UTF-8 encoded XML bytes. Renders the first structure by default.
+    """
+    generator = create_wheel(json_data, wheel_args, engine=engine, xml_cache_bytes=0, label_fit=label_fit,
+                             output_format=output_format)
+    if structure_name is None:
+        if not generator.structures_list:
+            raise ValueError("The wheel spec has no structures.")
+        structure_name = generator.structures_list[0]['name']
+    return generator.json_to_drawio(structure_name).encode('utf-8')
+
+
+def render_all_xml(json_data, wheel_args=DEFAULT_WHEEL_ARGS, engine='objects', label_fit=False, output_format='drawio'):
+    # Library entry point: render every structure of a wheel spec, as {name: XML bytes}
+    generator = create_wheel(json_data, wheel_args, engine=engine, xml_cache_bytes=0, label_fit=label_fit,
+                             output_format=output_format)
+    return {entry['name']: generator.json_to_drawio(entry['name']).encode('utf-8')
+            for entry in generator.structures_list}
+
+
+COMPILED_EXTENSION = '.wheelc'
+
+def compile_spec(input_filepath, output_filename, stream_json=False, use_mmap=False):
+    """
+    Compile a JSON spec to the binary format of compiled.py: the flattened structures with
+    their angles assigned, and the resolved level configs. The JSON spec stays the source of
+    truth: compile it again after changing it. Returns the number of compiled structures.
+    """
+    if stream_json or use_mmap:
+        with profiler.phase('json_load'):
+            header, structures = iter_spec_structures(input_filepath, use_mmap)
+    else:
+        json_data = load_json_file(input_filepath)
+        header = {key: value for key, value in json_data.items() if key != 'structures'}
+        structures = json_data['structures']
+    generator = create_wheel({**header, 'structures': []}, engine='columnar', xml_cache_bytes=0)
+
+    writer = CompiledWriter(generator.wheel_type, generator.json_levels_config)
+    compiled_names = set()
+    level_count = 0
+    for structure in structures:
+        name = Wheel._structure_name(structure)
+        if name in compiled_names:
+            continue  # Like the structure index, the first structure of a name wins
+        tree = generator._create_tree(structure)
+        writer.add_structure(name, tree, RenderCache.make_key(structure))
+        compiled_names.add(name)
+        level_count = max(level_count, len(tree.level_ranges))
+
+    with profiler.phase('write_compiled'):
+        writer.write(output_filename, generator.level_config_resolver.resolved_configs(level_count),
+                     _compiled_code_version())
+    logger.info(f"Compiled {len(compiled_names)} structures of {input_filepath} to {output_filename}")
+    return len(compiled_names)
+
+
+def _compiled_code_version():
+    # Compiled files hold angles and level configs computed by this code
+    return source_fingerprint(os.path.abspath(__file__), os.path.abspath(columnar.__file__),
+                              os.path.abspath(angle_rules.__file__))
+
+
+def load_compiled_wheel(input_filepath, wheel_args=DEFAULT_WHEEL_ARGS, **wheel_options):
+    """
+    Wheel over a compiled file (see compile_spec): its structures are memory-mapped, with the
+    angles assigned and the level configs resolved, so rendering skips the JSON parsing and
+    the angle computation. Always uses the columnar engine.
+    """
+    with profiler.phase('load_compiled'):
+        compiled_spec = CompiledSpec(input_filepath)
+    if compiled_spec.code_version != _compiled_code_version():
+        logger.warning(f"{input_filepath} was compiled by another version of the generator, "
+                       f"compile it again from its JSON spec to pick up the changes")
+    # The structure stubs carry the hash of the JSON they were compiled from, for the render cache keys
+    structures = [{'name': name, 'source_hash': structure['source_hash']}
+                  for name, structure in compiled_spec.structures.items()]
+    generator = create_wheel({'type': compiled_spec.wheel_type, 'levels_config': compiled_spec.levels_config,
+                              'structures': structures}, wheel_args, **{**wheel_options, 'engine': 'columnar'})
+    generator.level_config_resolver.preload(compiled_spec.level_configs)
+    generator.compiled_spec = compiled_spec
+    logger.info(f"Loaded {len(structures)} compiled structures from {input_filepath}")
+    return generator
+
+
+# Output compression: 'deflate' stores the diagram as a compressed payload inside the .drawio
+# file (the format draw.io itself saves with compression on, opened as is); 'gzip' compresses
+# the whole file, written with a '.gz' suffix
+COMPRESSION_MODES = ('none', 'deflate', 'gzip')
+
+def open_output_file(output_filename, compression='none'):
+    if compression == 'gzip':
+        return gzip.open(output_filename, 'wt', encoding='utf-8', compresslevel=6)  # zlib's default level, like 'deflate'
+    return open(output_filename, 'w', encoding='utf-8')
+
+
+def structure_output_filename(output_folder, filename_prefix, entry_name, extension='drawio', compression='none'):
+    output_filename = os.path.join(output_folder, f"{filename_prefix}_{entry_name}.{extension}")
+    return f"{output_filename}.gz" if compression == 'gzip' else output_filename
+
+
+def render_structure(generator, entry_name, output_filename, stream=True, cache=None, force=False, compression='none'):
+    """
+    Render one structure and write it to output_filename, compressed according to `compression`.
+    Errors are isolated per structure: returns (entry_name, output_filename, elapsed, error, skipped)
+    where error is None on success, or the formatted traceback otherwise, and skipped tells
+    that the structure was unchanged in the cache and its existing output was kept.
+    """
+    logger.debug(f"Starting XML generation for: {entry_name}")
+    start_time = time.perf_counter()
+    try:
+        cache_key = None
+        if cache is not None:
+            cache_key = RenderCache.make_key(generator.structure_cache_key(entry_name), compression,
+                                             os.path.abspath(output_filename))
+            if not force and cache.is_fresh(cache_key, output_filename):
+                return entry_name, output_filename, time.perf_counter() - start_time, None, True
+
+        if stream:
+            generator.write_drawio(entry_name, output_filename, compression=compression)
         else:
-            for node in nodes:
-                if node.percentage == 0:
-                    logger.debug(f"Skipping node '{node.label}' at this level due to 0% percentage")
-                    continue
-                angle_proportion = node.percentage / 100.0
-                angle_span = total_angle * angle_proportion
-                node.start_angle = current_angle
-                if current_angle + angle_span == 1.0:
-                    node.end_angle = 1.0
-                else:
-                    node.end_angle = (current_angle + angle_span) % 1.0
+            xml_output = generator.json_to_drawio(entry_name, compressed=compression == 'deflate')
+            with profiler.phase('write'), open_output_file(output_filename, compression) as file:
+                file.write(xml_output)
 
+        if cache_key is not None:
+            cache.record(cache_key, output_filename)
+    except Exception:
+        return entry_name, output_filename, None, traceback.format_exc(), False
+    return entry_name, output_filename, time.perf_counter() - start_time, None, False
+
+
+# Process pool workers build their own wheel once (wheels hold lambdas, they can't be pickled)
+_worker_generator = None
+
+def _init_worker_logger(log_level, tracing=False, profiling=False):
+    global logger, node_tracing, profiler
+    if not logger.handlers:
+        logger = initialize_logger(log_level)
+    node_tracing = tracing
+    profiler = Profiler() if profiling else NullProfiler()
+
+def _init_render_worker(wheel_class, wheel_args, json_data, log_level, wheel_options, tracing, profiling):
+    global _worker_generator
+    _init_worker_logger(log_level, tracing, profiling)
+    _worker_generator = wheel_class(*wheel_args, json_data, **wheel_options)
+
+def _init_compiled_render_worker(compiled_filepath, wheel_args, log_level, wheel_options, tracing, profiling):
+    global _worker_generator
+    _init_worker_logger(log_level, tracing, profiling)
+    _worker_generator = load_compiled_wheel(compiled_filepath, wheel_args, **wheel_options)
+
+def _render_worker_task(entry_name, output_filename, stream, cache, force, compression='none'):
+    # Also returns the profile of the task (None when profiling is disabled), merged by the parent process
+    result = render_structure(_worker_generator, entry_name, output_filename, stream, cache, force, compression)
+    snapshot = profiler.snapshot()
+    profiler.reset()
+    return result, snapshot
+
+def _render_streamed_worker_task(structure_json, output_filename, stream, cache, force, compression='none'):
+    # Streaming ingestion: the structure comes with the task (as JSON text, smaller than the
+    # dict while the task is pending), its JSON is dropped once built and it is released once rendered
+    structure = json.loads(structure_json)
+    del structure_json
+    entry_name = Wheel._structure_name(structure)
+    _worker_generator.keep_structure_json = False
+    _worker_generator.replace_structure(structure)
+    del structure
+    try:
+        return _render_worker_task(entry_name, output_filename, stream, cache, force, compression)
+    finally:
+        _worker_generator.release_structure(entry_name)
 
-                logger.debug(f"Assigned angles to node '{node.label}': start_angle={node.start_angle}, end_angle={node.end_angle}")
+def _render_page_worker_task(entry_name, page_filename, stream, compression):
+    # Multi-page documents: render one page to its own file, assembled by the parent process
+    start_time = time.perf_counter()
+    try:
+        with open(page_filename, 'w', encoding='utf-8') as page_file:
+            _worker_generator.write_drawio_page(entry_name, page_file, compression == 'deflate', stream)
+        result = entry_name, page_filename, time.perf_counter() - start_time, None
+    except Exception:
+        result = entry_name, page_filename, None, traceback.format_exc()
+    snapshot = profiler.snapshot()
+    profiler.reset()
+    return result, snapshot
+
+def _collect_worker_result(future):
+    # Result of a worker task, merging its profile into the profile of this process
+    result, snapshot = future.result()
+    if snapshot is not None:
+        profiler.merge(snapshot)
+    return result
+
+def _wheel_args(generator):
+    return (generator.center_x, generator.center_y, generator.text_width, generator.text_height,
+            generator.stroke_color, generator.font_color)
+
+def _wheel_options(generator):
+    # Options to rebuild the wheel in worker processes (load_compiled_wheel forces the engine)
+    return {'engine': generator.engine, 'label_fit': generator.label_fit, 'output_format': generator.output_format}
+
+
+def render_structures(generator, json_data, output_folder, filename_prefix, extension='drawio',
+                      jobs=1, stream=True, log_level=logging.INFO, cache=None, force=False, structure_names=None,
+                      compression='none'):
+    """
+    Render every structure of the wheel (or only the ones in structure_names) to
+    '<output_folder>/<filename_prefix>_<name>.<extension>', optionally in a pool of `jobs` processes.
+    Returns the render_structure results, in file order.
+    """
+    if structure_names is None:
+        structure_names = [entry['name'] for entry in generator.structures_list]
+    render_tasks = []
+    for entry_name in structure_names:
+        output_filename = structure_output_filename(output_folder, filename_prefix, entry_name, extension, compression)
+        render_tasks.append((entry_name, output_filename))
+
+    start_time = time.perf_counter()
+    if jobs > 1 and len(render_tasks) > 1:
+        if generator.compiled_spec is not None:
+            initializer = _init_compiled_render_worker
+            initargs = (generator.compiled_spec.filename, _wheel_args(generator), log_level, _wheel_options(generator),
+                        node_tracing, profiler.enabled)
+        else:
+            initializer = _init_render_worker
+            initargs = (type(generator), _wheel_args(generator), json_data, log_level,
+                        _wheel_options(generator), node_tracing, profiler.enabled)
+        with ProcessPoolExecutor(max_workers=jobs, initializer=initializer, initargs=initargs) as executor:
+            futures = [executor.submit(_render_worker_task, entry_name, output_filename, stream, cache, force, compression)
+                       for entry_name, output_filename in render_tasks]
+            # Collect in submission order, so the report is deterministic
+            results = [_collect_worker_result(future) for future in futures]
+    else:
+        results = [render_structure(generator, entry_name, output_filename, stream, cache, force, compression)
+                   for entry_name, output_filename in render_tasks]
+
+    _log_render_results(results, start_time, jobs)
+    return results
+
+
+def _log_render_results(results, start_time, jobs):
+    failures = 0
+    bytes_written = 0
+    for entry_name, output_filename, elapsed, error, skipped in results:
+        if skipped:
+            logger.info(f"XML representation for {entry_name} is unchanged, keeping {output_filename}")
+        elif error is None:
+            output_size = os.path.getsize(output_filename)
+            bytes_written += output_size
+            logger.info(f"XML representation for {entry_name} has been written to {output_filename} "
+                        f"in {elapsed:.3f}s ({output_size} bytes)")
+            print(f"XML representation for {entry_name} has been written to {output_filename}")
+        else:
+            failures += 1
+            logger.error(f"Failed to generate or write XML for {entry_name}: {error}")
+
+    logger.info(f"Rendered {len(results) - failures}/{len(results)} structures in {time.perf_counter() - start_time:.3f}s "
+                f"(jobs={jobs}), {bytes_written} bytes written")
+
+
+def render_pages(generator, json_data, output_folder, filename_prefix, extension='drawio', jobs=1, stream=True,
+                 log_level=logging.INFO, cache=None, force=False, structure_names=None, compression='none'):
+    """
+    Render every structure of the wheel (or only the ones in structure_names) as the <diagram>
+    pages of a single '<output_folder>/<filename_prefix>.<extension>' document, in file order.
+    Serially, the pages are streamed straight into the document; with `jobs` processes, each
+    page is rendered to a temporary file and the pages are then concatenated in file order.
+    A failing structure is left out of the document. Returns render_structure-like results.
+    """
+    if generator.output_format != 'drawio':
+        raise ValueError("Multi-page documents are a draw.io format, they cannot be rendered as SVG")
+    if structure_names is None:
+        structure_names = [entry['name'] for entry in generator.structures_list]
+    output_filename = os.path.join(output_folder, f"{filename_prefix}.{extension}")
+    if compression == 'gzip':
+        output_filename += '.gz'
+    compressed = compression == 'deflate'
+    start_time = time.perf_counter()
+
+    cache_key = None
+    if cache is not None:
+        try:
+            cache_key = RenderCache.make_key([generator.structure_cache_key(name) for name in structure_names],
+                                             compression, 'pages', os.path.abspath(output_filename))
+        except ValueError:
+            cache_key = None  # Unknown structure: reported as a failure of its page below
+        if cache_key is not None and not force and cache.is_fresh(cache_key, output_filename):
+            logger.info(f"{output_filename} is unchanged, keeping it")
+            return [(name, output_filename, 0.0, None, True) for name in structure_names]
+
+    page_results = []
+    with profiler.phase('write_pages'), open_output_file(output_filename, compression) as output_file:
+        output_file.write(DiagramGenerator.MXFILE_HEADER)
+        pages_written = 0
+        if jobs > 1 and len(structure_names) > 1:
+            if generator.compiled_spec is not None:
+                initializer = _init_compiled_render_worker
+                initargs = (generator.compiled_spec.filename, _wheel_args(generator), log_level, _wheel_options(generator),
+                            node_tracing, profiler.enabled)
+            else:
+                initializer = _init_render_worker
+                initargs = (type(generator), _wheel_args(generator), json_data, log_level,
+                            _wheel_options(generator), node_tracing, profiler.enabled)
+            with tempfile.TemporaryDirectory(dir=output_folder) as page_folder, \
+                    ProcessPoolExecutor(max_workers=jobs, initializer=initializer, initargs=initargs) as executor:
+                futures = [executor.submit(_render_page_worker_task, entry_name,
+                                           os.path.join(page_folder, f"{index}.page"), stream, compression)
+                           for index, entry_name in enumerate(structure_names)]
+                # Assemble in submission order, so the document does not depend on the scheduling
+                for future in futures:
+                    entry_name, page_filename, elapsed, error = _collect_worker_result(future)
+                    if error is None:
+                        if pages_written:
+                            output_file.write(DiagramGenerator.PAGE_SEPARATOR)
+                        with open(page_filename, 'r', encoding='utf-8') as page_file:
+                            shutil.copyfileobj(page_file, output_file)
+                        os.remove(page_filename)
+                        pages_written += 1
+                    page_results.append((entry_name, elapsed, error))
+        else:
+            for entry_name in structure_names:
+                page_start_time = time.perf_counter()
+                try:
+                    # The page is rendered before anything is written, so a failing page leaves no trace
+                    diagram = generator._render_diagram(entry_name, streaming=stream)
+                    try:
+                        if pages_written:
+                            output_file.write(DiagramGenerator.PAGE_SEPARATOR)
+                        diagram.write_page(entry_name, output_file, compressed)
+                    finally:
+                        diagram.close()
+                    pages_written += 1
+                    page_results.append((entry_name, time.perf_counter() - page_start_time, None))
+                except Exception:
+                    page_results.append((entry_name, None, traceback.format_exc()))
+        output_file.write(DiagramGenerator.MXFILE_FOOTER)
+
+    failures = [entry_name for entry_name, _, error in page_results if error is not None]
+    for entry_name, elapsed, error in page_results:
+        if error is None:
+            logger.info(f"Page {entry_name} rendered in {elapsed:.3f}s")
+        else:
+            logger.error(f"Failed to generate or write the page of {entry_name}: {error}")
+    if cache_key is not None and not failures:
+        cache.record(cache_key, output_filename)
+
+    logger.info(f"Wrote {pages_written}/{len(page_results)} pages to {output_filename} in "
+                f"{time.perf_counter() - start_time:.3f}s (jobs={jobs}), {os.path.getsize(output_filename)} bytes written")
+    print(f"XML representation of {pages_written} structures has been written to {output_filename}")
+    return [(entry_name, output_filename, elapsed, error, False) for entry_name, elapsed, error in page_results]
+
+
+def generate_file(input_filepath, output_folder, extension='drawio', jobs=1, stream=True, log_level=logging.INFO,
+                  cache=None, force=False, wheel_options=None, structure_names=None, stream_json=False, use_mmap=False,
+                  compression='none', multi_page=False):
+    # Load one JSON spec and render all of its structures.
+    # Raises if the spec can't be loaded or the wheel can't be built
+    if (stream_json or use_mmap) and not is_compiled(input_filepath):
+        return generate_file_streaming(input_filepath, output_folder, extension, jobs, stream, log_level,
+                                       cache, force, wheel_options, structure_names, use_mmap, compression)
+    filename_without_extension = os.path.splitext(os.path.basename(input_filepath))[0]
+    if is_compiled(input_filepath):
+        json_data = None
+        generator = load_compiled_wheel(input_filepath, **(wheel_options or {}))
+    else:
+        json_data = load_json_file(input_filepath)
+        generator = create_wheel(json_data, **(wheel_options or {}))
+    if structure_names is not None:
+        # Selected structures that a spec does not have are skipped, not failures
+        structure_names = [name for name in structure_names if name in generator.structure_index]
+    if multi_page:
+        return render_pages(generator, json_data, output_folder, filename_without_extension,
+                            extension, jobs, stream, log_level, cache, force, structure_names, compression)
+    return render_structures(generator, json_data, output_folder, filename_without_extension,
+                             extension, jobs, stream, log_level, cache, force, structure_names, compression)
+
+
+def generate_file_streaming(input_filepath, output_folder, extension='drawio', jobs=1, stream=True,
+                            log_level=logging.INFO, cache=None, force=False, wheel_options=None,
+                            structure_names=None, use_mmap=False, compression='none'):
+    """
+    Variant of generate_file for very large specs: the structures are parsed one at a time
+    (json_stream), each one is built, rendered and released before the next one is parsed,
+    so the whole parsed JSON and object graph are never in memory together. With `jobs`
+    worker processes, at most 2 * jobs structures are in flight.
+    """
+    filename_without_extension = os.path.splitext(os.path.basename(input_filepath))[0]
+    with profiler.phase('json_load'):
+        header, structures = iter_spec_structures(input_filepath, use_mmap)
+    logger.info(f"Streaming the structures of {input_filepath}")
+    wheel_options = {**(wheel_options or {}), 'xml_cache_bytes': 0}
+    generator = create_wheel({**header, 'structures': []}, **wheel_options)
+    generator.keep_structure_json = False
+
+    def selected_structures(handle_structure):
+        # Yields (entry_name, output_filename) once handle_structure was given the structure,
+        # whose raw JSON is not referenced from here any more (see Wheel.keep_structure_json)
+        while True:
+            with profiler.phase('json_load'):
+                structure = next(structures, None)
+            if structure is None:
+                return
+            entry_name = Wheel._structure_name(structure)
+            if structure_names is not None and entry_name not in structure_names:
+                continue
+            output_filename = structure_output_filename(output_folder, filename_without_extension,
+                                                        entry_name, extension, compression)
+            handle_structure(structure, output_filename)
+            del structure
+            yield entry_name, output_filename
+
+    start_time = time.perf_counter()
+    results = []
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_render_worker,
+                                 initargs=(type(generator), _wheel_args(generator), {**header, 'structures': []},
+                                           log_level, wheel_options, node_tracing, profiler.enabled)) as executor:
+            pending = deque()
+
+            def submit_structure(structure, output_filename):
+                pending.append(executor.submit(_render_streamed_worker_task, json.dumps(structure), output_filename,
+                                               stream, cache, force, compression))
+
+            for _ in selected_structures(submit_structure):
+                if len(pending) >= 2 * jobs:
+                    results.append(_collect_worker_result(pending.popleft()))
+            results.extend(_collect_worker_result(future) for future in pending)
+    else:
+        for entry_name, output_filename in selected_structures(lambda structure, _: generator.replace_structure(structure)):
+            results.append(render_structure(generator, entry_name, output_filename, stream, cache, force, compression))
+            generator.release_structure(entry_name)
 
-                # Recursively assign angles to sub_nodes
-                if node.sub_nodes:
-                    self._assign_node_angles(node.sub_nodes, node.start_angle, node.end_angle)
+    _log_render_results(results, start_time, jobs)
+    return results
 
-                current_angle = node.end_angle
 
+def compile_file(input_filepath, output_folder, stream_json=False, use_mmap=False):
+    # CLI wrapper of compile_spec, writing '<output_folder>/<name>.wheelc'. Returns whether it succeeded
+    filename_without_extension = os.path.splitext(os.path.basename(input_filepath))[0]
+    output_filename = os.path.join(output_folder, f"{filename_without_extension}{COMPILED_EXTENSION}")
+    try:
+        compile_spec(input_filepath, output_filename, stream_json, use_mmap)
+    except Exception as e:
+        logger.error(f"Failed to compile {input_filepath}: {e}")
+        return False
+    print(f"Compiled {input_filepath} to {output_filename}")
+    return True
+
+
+def collect_input_files(path_or_pattern):
+    # A directory means all the JSON specs it contains, anything else is a glob pattern
+    if os.path.isdir(path_or_pattern):
+        return sorted(glob.glob(os.path.join(path_or_pattern, '*.json')))
+    return sorted(glob.glob(path_or_pattern, recursive=True))
+
+
+def _generate_file_task(input_filepath, output_folder, extension, stream, log_level, cache, force, wheel_options,
+                        structure_names=None, stream_json=False, use_mmap=False, compression='none', multi_page=False):
+    try:
+        return input_filepath, generate_file(input_filepath, output_folder, extension, 1, stream, log_level,
+                                             cache, force, wheel_options, structure_names, stream_json, use_mmap,
+                                             compression, multi_page), None
+    except Exception:
+        return input_filepath, [], traceback.format_exc()
+
+
+def _generate_file_worker_task(*task_args):
+    file_result = _generate_file_task(*task_args)
+    snapshot = profiler.snapshot()
+    profiler.reset()
+    return file_result, snapshot
+
+
+def run_batch(input_files, output_folder, extension='drawio', jobs=1, stream=True, log_level=logging.INFO,
+              cache=None, force=False, wheel_options=None, structure_names=None, stream_json=False, use_mmap=False,
+              compression='none', multi_page=False):
+    """
+    Generate all the given JSON specs in this process, or spread over a pool of `jobs`
+    processes (one file per task). Returns a summary dict with throughput and failures.
+    """
+    start_time = time.perf_counter()
+    if jobs > 1 and len(input_files) > 1:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker_logger,
+                                 initargs=(log_level, node_tracing, profiler.enabled)) as executor:
+            futures = [executor.submit(_generate_file_worker_task, input_filepath, output_folder, extension, stream, log_level, cache, force, wheel_options, structure_names, stream_json, use_mmap, compression, multi_page)
+                       for input_filepath in input_files]
+            file_results = [_collect_worker_result(future) for future in futures]
+    else:
+        file_results = [_generate_file_task(input_filepath, output_folder, extension, stream, log_level, cache, force, wheel_options, structure_names, stream_json, use_mmap, compression, multi_page)
+                        for input_filepath in input_files]
+    elapsed = time.perf_counter() - start_time
+
+    failed_files = []
+    failed_structures = []
+    structures_written = 0
+    structures_unchanged = 0
+    for input_filepath, results, error in file_results:
+        if error is not None:
+            logger.error(f"Failed to generate {input_filepath}: {error}")
+            failed_files.append(input_filepath)
+            continue
+        for entry_name, _, _, structure_error, skipped in results:
+            if skipped:
+                structures_unchanged += 1
+            elif structure_error is None:
+                structures_written += 1
+            else:
+                failed_structures.append(f"{input_filepath}:{entry_name}")
+
+    summary = {
+        'files': len(input_files),
+        'failed_files': failed_files,
+        'structures_written': structures_written,
+        'structures_unchanged': structures_unchanged,
+        'failed_structures': failed_structures,
+        'elapsed': elapsed,
+        'files_per_second': len(input_files) / elapsed if elapsed > 0 else 0.0,
+        'structures_per_second': structures_written / elapsed if elapsed > 0 else 0.0,
+    }
+    logger.info(
+        f"Batch done: {summary['files'] - len(failed_files)}/{summary['files']} files, "
+        f"{structures_written} structures written, {structures_unchanged} unchanged, {len(failed_structures)} structures failed "
+        f"in {elapsed:.3f}s ({summary['files_per_second']:.2f} files/s, {summary['structures_per_second']:.2f} structures/s)"
+    )
+    for failure in failed_files + failed_structures:
+        logger.warning(f"Failed: {failure}")
+    return summary
+
+
+def report_profile(destination):
+    # Print the profile report ('-'), or write it as JSON to the destination file
+    if not profiler.enabled or destination is None:
+        return
+    if destination == '-':
+        print(profiler.format_report())
+    else:
+        profiler.write_report(destination)
+        logger.info(f"Profile report written to {destination}")
 
 
 def main():
-    global logger
+    global logger, node_tracing, profiler
 
     # Argument Parsing
     # ---------------------------
     parser = argparse.ArgumentParser(description="Generate XML drawio output from a JSON file.")
-    parser.add_argument('--file', required=True, help='The input JSON file path')
-    parser.add_argument('--extension', required=False, default='drawio', 
-                        choices=['drawio', 'xml'], 
-                        help='The output file extension (default: .drawio)')
+    input_group = parser.add_mutually_exclusive_group(required=True)
+    input_group.add_argument('--file', help='The input JSON file path')
+    input_group.add_argument('--batch', help='A directory of JSON files, or a glob pattern (e.g. "specs/**/*.json"), to generate in one run')
+    parser.add_argument('--extension', required=False, default=None,
+                        choices=['drawio', 'xml', 'svg'],
+                        help='The output file extension (default: .drawio, or .svg with --format svg)')
+    parser.add_argument('--format', required=False, default='drawio', choices=tuple(Wheel.DIAGRAM_GENERATORS), dest='output_format',
+                        help="Output format: 'drawio' documents, or 'svg' images drawn directly from the wheel geometry (default: drawio)")
     parser.add_argument('--log-level', required=False, default='INFO', 
                         choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'], 
                         help='Set the logging level (default: INFO)')
+    parser.add_argument('--trace-nodes', required=False, action='store_true',
+                        help='Log a message for every node (creation, angles, drawing) instead of a summary per level')
+    parser.add_argument('--profile', required=False, nargs='?', const='-', default=None, metavar='REPORT_FILE',
+                        help='Time each generation phase and count nodes and cells per level; print the report, or write it as JSON to REPORT_FILE')
     parser.add_argument('--output', required=False, default='./output', 
                         help='The output folder where the generated XML/drawio files will be saved (default: ./output)')
+    parser.add_argument('--jobs', required=False, type=int, default=1,
+                        help='Number of worker processes rendering the structures (or, with --batch, the files) concurrently (default: 1)')
+    parser.add_argument('--engine', required=False, default='objects', choices=Wheel.ENGINES,
+                        help="Rendering engine: 'objects' (Node/Level objects) or 'columnar' (flattened arrays, level geometry in batches, with NumPy when installed) (default: objects)")
+    parser.add_argument('--force', required=False, action='store_true',
+                        help='Regenerate every structure, even the ones unchanged since the previous run')
+    parser.add_argument('--no-cache', required=False, action='store_true',
+                        help='Disable the render cache (no lookup and no recording)')
+    parser.add_argument('--cache-dir', required=False, default=None,
+                        help='Folder of the render cache (default: $XDG_CACHE_HOME/sunburst-generator/render, '
+                             'with ~/.cache when XDG_CACHE_HOME is not set)')
+    parser.add_argument('--cache-max-bytes', required=False, type=int, default=RenderCache.DEFAULT_MAX_BYTES,
+                        help=f'Maximum disk space of the render cache entries, least recently used ones are evicted first (default: {RenderCache.DEFAULT_MAX_BYTES})')
+    parser.add_argument('--no-stream', required=False, action='store_true',
+                        help='Build each document in memory instead of streaming it to the output file')
+    parser.add_argument('--structure', required=False, action='append', default=None, metavar='NAME', dest='structures',
+                        help='Only build and render the structure with this name (can be repeated)')
+    parser.add_argument('--stream-json', required=False, action='store_true',
+                        help='Parse the input JSON one structure at a time, rendering and releasing each one before parsing the next (for very large specs)')
+    parser.add_argument('--mmap', required=False, action='store_true',
+                        help='With --stream-json (implied), memory-map the input file instead of reading it')
+    parser.add_argument('--compress', required=False, default='none', choices=COMPRESSION_MODES,
+                        help="Output compression: 'deflate' stores the diagram as a compressed payload that draw.io opens as is, "
+                             "'gzip' compresses the whole file (written as <name>.<extension>.gz) (default: none)")
+    parser.add_argument('--fit-labels', required=False, action='store_true',
+                        help='Auto-fit the labels to their node: shrink the font of the labels that do not fit, '
+                             f'down to {LabelFitter.MIN_FONT_SIZE}, then truncate them with an ellipsis')
+    parser.add_argument('--multi-page', required=False, action='store_true',
+                        help='Write all the structures of an input file as the pages of a single <output>/<name>.<extension> document')
+    parser.add_argument('--compile', required=False, action='store_true',
+                        help=f'Compile the input JSON spec(s) to <output>/<name>{COMPILED_EXTENSION} instead of rendering them; '
+                             'compiled files can then be rendered with --file/--batch, skipping the JSON parsing and the angle computation')
 
     args = parser.parse_args()
+    if args.multi_page and (args.stream_json or args.mmap):
+        parser.error('--multi-page cannot be combined with --stream-json/--mmap')
+    if args.output_format == 'svg' and (args.multi_page or args.compress == 'deflate'):
+        parser.error("--format svg cannot be combined with --multi-page or --compress deflate (draw.io features)")
+    if args.extension is None:
+        args.extension = 'svg' if args.output_format == 'svg' else 'drawio'
 
     log_level = getattr(logging, args.log_level.upper(), logging.DEBUG)
     logger = initialize_logger(log_level)
+    node_tracing = args.trace_nodes
+    if args.profile:
+        profiler = Profiler()
 
-    # JSON Loading
-    # -----------------------
-    input_filepath = args.file
-    filename_without_extension = os.path.splitext(os.path.basename(input_filepath))[0]
-    
-    try:
-        with open(input_filepath, 'r', encoding='utf-8') as json_file:
-            json_data = json.load(json_file)
-            logger.info(f"Successfully loaded JSON data from {input_filepath}")
-    except Exception as e:
-        logger.error(f"Failed to load JSON file: {input_filepath} - Error: {e}")
-        exit(1)
+    wheel_options = {'engine': args.engine, 'label_fit': args.fit_labels, 'output_format': args.output_format}
 
     # Output Directory Handling
     # ------------------------------------
@@ -813,38 +1986,104 @@ def main():
             logger.error(f"Failed to create output directory: {output_folder} - Error: {e}")
             exit(1)
 
-    # Dynamically choose the wheel class based on 'type' in JSON
+    # Render Cache
     # ------------------------------------
-    wheel_type = json_data.get('type')
-    if wheel_type == 'flavor_wheel':
-        generator = FlavorWheel(320, 290, 80, 30, '#808080', '#000000', json_data)
-    elif wheel_type == 'percentage_wheel':
-        generator = PercentageWheel(320, 290, 80, 30, '#808080', '#000000', json_data)
-    else:
-        logger.error(f"Unsupported wheel type: {wheel_type}")
-        exit(1)
+    cache = None
+    if not args.no_cache:
+        cache = RenderCache(args.cache_dir or default_cache_dir(), max_bytes=args.cache_max_bytes)
 
-    # XML Generation and Output
+    # Batch Mode
     # ------------------------------------
-    for entry in generator.structures_list:
-        entry_name = entry['name']
-        logger.debug(f"Starting XML generation for: {entry_name}")
-        
-        try:
-            xml_output = generator.json_to_drawio(entry_name)
+    if args.batch:
+        input_files = collect_input_files(args.batch)
+        if not input_files:
+            logger.error(f"No JSON file found for: {args.batch}")
+            exit(1)
+        if args.compile:
+            failures = [input_filepath for input_filepath in input_files
+                        if not compile_file(input_filepath, output_folder, args.stream_json, args.mmap)]
+            report_profile(args.profile)
+            if failures:
+                exit(1)
+            return
+        summary = run_batch(input_files, output_folder, args.extension, args.jobs, not args.no_stream, log_level,
+                            cache, args.force, wheel_options, args.structures, args.stream_json, args.mmap,
+                            args.compress, args.multi_page)
+        if cache is not None:
+            cache.evict()
+        report_profile(args.profile)
+        if summary['failed_files'] or summary['failed_structures']:
+            exit(1)
+        return
 
-            output_extension = args.extension 
-            output_filename = os.path.join(output_folder, f"{filename_without_extension}_{entry_name}.{output_extension}")
+    # JSON Loading
+    # -----------------------
+    input_filepath = args.file
+    filename_without_extension = os.path.splitext(os.path.basename(input_filepath))[0]
 
-            with open(output_filename, "w", encoding='utf-8') as file:
-                file.write(xml_output)
+    if args.compile:
+        if not compile_file(input_filepath, output_folder, args.stream_json, args.mmap):
+            exit(1)
+        report_profile(args.profile)
+        return
 
-            logger.info(f"XML representation for {entry_name} has been written to {output_filename}")
-            print(f"XML representation for {entry_name} has been written to {output_filename}")
-        
+    if (args.stream_json or args.mmap) and not is_compiled(input_filepath):
+        try:
+            results = generate_file_streaming(input_filepath, output_folder, args.extension, args.jobs, not args.no_stream,
+                                              log_level, cache, args.force, wheel_options, args.structures, args.mmap,
+                                              args.compress)
+        except Exception as e:
+            logger.error(f"Failed to stream JSON file: {input_filepath} - Error: {e}")
+            exit(1)
+        rendered_structures = {result[0] for result in results}
+        unknown_structures = [name for name in args.structures or [] if name not in rendered_structures]
+        if unknown_structures:
+            logger.error(f"Structures not found in {input_filepath}: {', '.join(unknown_structures)}")
+            exit(1)
+        if cache is not None:
+            cache.evict()
+        report_profile(args.profile)
+        return
+    
+    if is_compiled(input_filepath):
+        # Compiled file: no JSON to parse, the wheel comes pre-built
+        json_data = None
+        try:
+            generator = load_compiled_wheel(input_filepath, **wheel_options)
         except Exception as e:
-            logger.error(f"Failed to generate or write XML for {entry_name}: {e}", exc_info=True)
+            logger.error(f"Failed to load compiled file: {input_filepath} - Error: {e}")
+            exit(1)
+    else:
+        try:
+            json_data = load_json_file(input_filepath)
+        except Exception as e:
+            logger.error(f"Failed to load JSON file: {input_filepath} - Error: {e}")
+            exit(1)
+
+        # Dynamically choose the wheel class based on 'type' in JSON
+        # ------------------------------------
+        try:
+            generator = create_wheel(json_data, **wheel_options)
+        except ValueError as e:
+            logger.error(str(e))
+            exit(1)
+
+    unknown_structures = [name for name in args.structures or [] if name not in generator.structure_index]
+    if unknown_structures:
+        logger.error(f"Structures not found in {input_filepath}: {', '.join(unknown_structures)} "
+                     f"(available: {', '.join(generator.structure_index)})")
+        exit(1)
+
+    # XML Generation and Output
+    # ------------------------------------
+    render = render_pages if args.multi_page else render_structures
+    render(generator, json_data, output_folder, filename_without_extension,
+           args.extension, args.jobs, not args.no_stream, log_level, cache, args.force, args.structures,
+           args.compress)
+    if cache is not None:
+        cache.evict()
+    report_profile(args.profile)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,190 @@
+import codecs
+import json
+import mmap
+
+# Event key of the elements of the top-level 'structures' array (same naming as ijson prefixes)
+STRUCTURE_ITEM = 'structures.item'
+
+# Top-level members a wheel needs before its structures can be built (the optional ones may
+# be missing from the spec)
+HEADER_KEYS = ('type',)
+OPTIONAL_HEADER_KEYS = ('levels_config',)
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+class _TextCursor:
+    """
+    Text buffer over an incrementally read source. Values are decoded with
+    JSONDecoder.raw_decode, reading more of the source whenever a value runs past the end
+    of the buffer, and the consumed text is dropped as the cursor moves on.
+    """
+    WHITESPACE = ' \t\n\r'
+
+    def __init__(self, read_chunk, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.read_chunk = read_chunk
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.exhausted = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size):
+        # Append at least one chunk of the source, returns False at the end of the source
+        if self.exhausted:
+            return False
+        if self.pos:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        chunk = self.read_chunk(max(size, self.chunk_size))
+        if not chunk:
+            self.exhausted = True
+            return False
+        self.buffer += chunk
+        return True
+
+    def peek(self):
+        # Next non-whitespace character (not consumed), '' at the end of the source
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in self.WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill(self.chunk_size):
+                return ''
+
+    def expect(self, characters):
+        character = self.peek()
+        if not character or character not in characters:
+            raise ValueError(f"Invalid JSON: expected one of {characters!r}, found {character or 'end of input'!r}")
+        self.pos += 1
+        return character
+
+    def decode_value(self):
+        self.peek()
+        read_size = self.chunk_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A number (or literal) ending with the buffer may continue in the next chunk
+                if end < len(self.buffer) or self.exhausted:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.exhausted:
+                    raise
+            # Incomplete value: read more, doubling the read size for big values
+            self._fill(read_size)
+            read_size *= 2
+
+
+def _file_reader(json_file):
+    return json_file.read
+
+
+def _mmap_reader(mapped_file):
+    # Decode the mapped bytes chunk by chunk (a UTF-8 sequence may span two chunks)
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    offset = 0
+
+    def read_chunk(size):
+        nonlocal offset
+        while offset < len(mapped_file):
+            chunk = mapped_file[offset:offset + size]
+            offset += len(chunk)
+            text = decoder.decode(chunk, final=offset >= len(mapped_file))
+            if text:
+                return text
+        return ''
+    return read_chunk
+
+
+def iter_spec_events(input_filepath, use_mmap=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Read a wheel spec incrementally: yield (key, value) for each top-level member, except the
+    'structures' array, whose elements are yielded one by one as (STRUCTURE_ITEM, structure).
+    Only one structure is held in memory at a time. With use_mmap, the file is memory-mapped
+    instead of read.
+    """
+    with open(input_filepath, 'rb' if use_mmap else 'r', **({} if use_mmap else {'encoding': 'utf-8'})) as json_file:
+        if use_mmap:
+            if not json_file.seek(0, 2):
+                raise ValueError(f"Invalid JSON: {input_filepath} is empty")
+            with mmap.mmap(json_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+                yield from _iter_events(_TextCursor(_mmap_reader(mapped_file), chunk_size))
+        else:
+            yield from _iter_events(_TextCursor(_file_reader(json_file), chunk_size))
+
+
+def _iter_events(cursor):
+    cursor.expect('{')
+    if cursor.peek() == '}':
+        return
+    while True:
+        key = cursor.decode_value()
+        if not isinstance(key, str):
+            raise ValueError(f"Invalid JSON: object keys must be strings, found {key!r}")
+        cursor.expect(':')
+        if key == 'structures' and cursor.peek() == '[':
+            cursor.expect('[')
+            if cursor.peek() == ']':
+                cursor.expect(']')
+            else:
+                while True:
+                    yield STRUCTURE_ITEM, cursor.decode_value()
+                    if cursor.expect(',]') == ']':
+                        break
+        else:
+            yield key, cursor.decode_value()
+        if cursor.expect(',}') == '}':
+            break
+    if cursor.peek():
+        raise ValueError("Invalid JSON: extra data after the top-level object")
+
+
+def iter_spec_structures(input_filepath, use_mmap=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Returns (header, structures): the top-level members other than 'structures', and an
+    iterator over the structures. When the header members come before the structures, or the
+    optional ones are not in the file at all, the file is read in a single pass; otherwise
+    the structures are skipped while reading the header, and read again in a second pass.
+    """
+    events = iter_spec_events(input_filepath, use_mmap, chunk_size)
+    header = {}
+    for key, value in events:
+        if key != STRUCTURE_ITEM:
+            header[key] = value
+            continue
+        if all(header_key in header for header_key in HEADER_KEYS):
+            missing_keys = [header_key for header_key in OPTIONAL_HEADER_KEYS if header_key not in header]
+            if not any(_may_contain_key(input_filepath, header_key) for header_key in missing_keys):
+                return header, _iter_structures(events, first_structure=value, missing_keys=missing_keys)
+        del value
+        header.update((key, value) for key, value in events if key != STRUCTURE_ITEM)
+        return header, _iter_structures(iter_spec_events(input_filepath, use_mmap, chunk_size))
+    return header, iter(())
+
+
+def _may_contain_key(input_filepath, key):
+    # Byte search for the key as a JSON string, much faster than decoding the structures to
+    # find it (a key spelled with escapes is caught by _iter_structures)
+    with open(input_filepath, 'rb') as json_file, \
+            mmap.mmap(json_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+        return mapped_file.find(json.dumps(key).encode('utf-8')) != -1
+
+
+def _iter_structures(events, first_structure=None, missing_keys=()):
+    # The structures are passed through a one-item list, so this generator does not keep the
+    # last one referenced while the consumer renders it
+    slot = []
+    if first_structure is not None:
+        slot.append(first_structure)
+        del first_structure
+        yield slot.pop()
+    for key, value in events:
+        if key == STRUCTURE_ITEM:
+            slot.append(value)
+            del value
+            yield slot.pop()
+        elif key in missing_keys:
+            raise ValueError(f"Invalid spec: '{key}' found after the structures, which were read without it")
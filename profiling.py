@@ -0,0 +1,99 @@
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+
+class Profiler:
+    """
+    Timers and counters around the generation phases (JSON load, node creation, level
+    configuration, level processing, XML assembly...), plus node and cell counts per level.
+    Snapshots are plain dicts, so the profiles of worker processes can be merged.
+    """
+    enabled = True
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.phase_times = defaultdict(float)
+        self.phase_calls = defaultdict(int)
+        self.counters = defaultdict(int)
+        self.levels = defaultdict(lambda: {'nodes': 0, 'cells': 0})
+
+    @contextmanager
+    def phase(self, name):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_times[name] += time.perf_counter() - start_time
+            self.phase_calls[name] += 1
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def record_level(self, level_number, nodes, cells):
+        level = self.levels[level_number]
+        level['nodes'] += nodes
+        level['cells'] += cells
+
+    def snapshot(self):
+        return {
+            'phases': {name: {'seconds': self.phase_times[name], 'calls': self.phase_calls[name]}
+                       for name in self.phase_times},
+            'counters': dict(self.counters),
+            'levels': {str(level_number): dict(level) for level_number, level in sorted(self.levels.items())},
+        }
+
+    def merge(self, snapshot):
+        for name, phase in snapshot['phases'].items():
+            self.phase_times[name] += phase['seconds']
+            self.phase_calls[name] += phase['calls']
+        for name, value in snapshot['counters'].items():
+            self.counters[name] += value
+        for level_number, level in snapshot['levels'].items():
+            self.record_level(int(level_number), level['nodes'], level['cells'])
+
+    def format_report(self):
+        lines = ["Profile report", "==============", "", f"{'Phase':<20} {'Calls':>8} {'Seconds':>12}"]
+        for name, seconds in sorted(self.phase_times.items(), key=lambda item: -item[1]):
+            lines.append(f"{name:<20} {self.phase_calls[name]:>8} {seconds:>12.6f}")
+        if self.counters:
+            lines += ["", f"{'Counter':<20} {'Value':>8}"]
+            lines += [f"{name:<20} {value:>8}" for name, value in sorted(self.counters.items())]
+        if self.levels:
+            lines += ["", f"{'Level':<20} {'Nodes':>8} {'Cells':>12}"]
+            lines += [f"{level_number:<20} {level['nodes']:>8} {level['cells']:>12}"
+                      for level_number, level in sorted(self.levels.items())]
+        return "\n".join(lines)
+
+    def write_report(self, filename):
+        with open(filename, 'w', encoding='utf-8') as report_file:
+            json.dump(self.snapshot(), report_file, indent=2)
+
+
+class NullProfiler:
+    """
+    Profiler used when profiling is disabled: every hook is a no-op.
+    """
+    enabled = False
+    _phase_context = nullcontext()
+
+    def phase(self, name):
+        return self._phase_context
+
+    def count(self, name, amount=1):
+        pass
+
+    def record_level(self, level_number, nodes, cells):
+        pass
+
+    def snapshot(self):
+        return None
+
+    def merge(self, snapshot):
+        pass
+
+    def reset(self):
+        pass
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import logging
+import os
+import functools
+from collections import OrderedDict
+
+logger = logging.getLogger('XMLGeneratorLogger')
+
+
+@functools.lru_cache(maxsize=None)
+def source_fingerprint(*paths):
+    # Hash of the generator source files, so that changing the code invalidates the cache
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as source_file:
+            digest.update(source_file.read())
+    return digest.hexdigest()
+
+
+def default_cache_dir():
+    # Per-user cache folder ($XDG_CACHE_HOME, ~/.cache by default), out of the output folders
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'sunburst-generator', 'render')
+
+
+class RenderCache:
+    """
+    On-disk cache of the rendered structures, keyed by a content hash.
+    Each key is a small entry file recording the output file that was written for it
+    (path, size and modification time), so an unchanged structure whose output is still
+    on disk can skip rendering altogether. Entries are written atomically, one file per
+    key, so several worker processes can share the same cache directory.
+    Eviction is least-recently-used (entry files are touched on every hit), bounded by
+    max_bytes of disk space taken by the entry files.
+    """
+    DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def make_key(*parts):
+        # Normalized JSON of all the parts: key order and whitespace do not matter
+        normalized = json.dumps(parts, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=repr)
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def is_fresh(self, key, output_filename):
+        # A hit needs the entry, and the recorded output file to be untouched since it was written
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as entry_file:
+                entry = json.load(entry_file)
+            output_stat = os.stat(output_filename)
+        except (OSError, ValueError):
+            return False
+
+        if (entry.get('output_filename') != os.path.abspath(output_filename)
+                or entry.get('size') != output_stat.st_size
+                or entry.get('mtime_ns') != output_stat.st_mtime_ns):
+            return False
+
+        os.utime(entry_path)  # Mark as recently used
+        return True
+
+    def record(self, key, output_filename):
+        # A cache folder that cannot be written only costs the next run a render
+        output_stat = os.stat(output_filename)
+        entry = {
+            'output_filename': os.path.abspath(output_filename),
+            'size': output_stat.st_size,
+            'mtime_ns': output_stat.st_mtime_ns,
+        }
+        entry_path = self._entry_path(key)
+        temp_path = f"{entry_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as entry_file:
+                json.dump(entry, entry_file)
+            os.replace(temp_path, entry_path)
+        except OSError as e:
+            logger.warning(f"Could not record {output_filename} in the render cache {self.cache_dir}: {e}")
+
+    @staticmethod
+    def _disk_size(entry_stat):
+        # Space taken on disk (whole blocks) where the platform reports it
+        blocks = getattr(entry_stat, 'st_blocks', None)
+        return blocks * 512 if blocks is not None else entry_stat.st_size
+
+    def evict(self):
+        # Drop the least recently used entries until they take at most max_bytes
+        try:
+            entry_names = [name for name in os.listdir(self.cache_dir) if name.endswith('.json')]
+        except FileNotFoundError:
+            return 0
+
+        entries = []
+        total_bytes = 0
+        for name in entry_names:
+            path = os.path.join(self.cache_dir, name)
+            try:
+                entry_stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((entry_stat.st_mtime_ns, path, RenderCache._disk_size(entry_stat)))
+            total_bytes += entries[-1][2]
+        if total_bytes <= self.max_bytes:
+            return 0
+        entries.sort()
+
+        evicted = 0
+        for _, path, size in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                evicted += 1
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+        logger.debug(f"Evicted {evicted} entries from the render cache {self.cache_dir}")
+        return evicted
+
+
+class XMLRenderCache:
+    """
+    In-memory LRU cache of rendered XML documents, bounded by the total UTF-8 size of the
+    cached documents (max_bytes). A max_bytes of 0 disables the cache.
+    """
+    DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # key -> (xml_content, size)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)  # Mark as recently used
+        return entry[0]
+
+    def put(self, key, xml_content, size=None):
+        # size: UTF-8 size of the entry, for entries that are not plain XML strings
+        if size is None:
+            size = len(xml_content.encode('utf-8'))
+        previous_entry = self._entries.pop(key, None)
+        if previous_entry is not None:
+            self.total_bytes -= previous_entry[1]
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (xml_content, size)
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.total_bytes -= evicted_size
+
+    def discard(self, predicate):
+        # Drop the entries whose key matches the predicate
+        for key in [key for key in self._entries if predicate(key)]:
+            _, size = self._entries.pop(key)
+            self.total_bytes -= size
+
+    def clear(self):
+        self._entries.clear()
+        self.total_bytes = 0
@@ -0,0 +1,369 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import socketserver
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import generate
+
+logger = logging.getLogger('XMLGeneratorLogger')
+
+# Listen backlog of the servers: with socketserver's default of 5, a burst of clients gets
+# its connections reset
+DEFAULT_BACKLOG = 128
+
+
+def _init_service_worker(log_level):
+    generate._init_worker_logger(log_level)
+
+
+def _render_body(body, structure_name, wheel_args, engine):
+    # Parse and render a raw request body, in the render executor: parsing a large spec on
+    # the event loop would stall every connection
+    try:
+        json_data = json.loads(body)
+    except ValueError as e:
+        raise ValueError(f"Invalid JSON: {e}") from None
+    return generate.render_xml(json_data, structure_name, wheel_args, engine)
+
+
+class RenderService:
+    """
+    Long-lived renderer built on generate.render_xml. With jobs > 0, the renders run in a
+    pool of warm worker processes (the interpreter and modules are loaded once); with
+    jobs == 0 they run in the calling thread.
+    """
+    def __init__(self, jobs=0, log_level=logging.WARNING):
+        self.jobs = jobs
+        self.executor = None  # None: the asyncio server uses the default thread pool
+        if jobs > 0:
+            self.executor = ProcessPoolExecutor(max_workers=jobs, initializer=_init_service_worker,
+                                                 initargs=(log_level,))
+
+    def render(self, json_data, structure_name=None, engine='objects'):
+        # Returns the drawio document of one structure as XML bytes
+        if self.executor is None:
+            return generate.render_xml(json_data, structure_name, engine=engine)
+        return self.executor.submit(generate.render_xml, json_data, structure_name,
+                                     generate.DEFAULT_WHEEL_ARGS, engine).result()
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    """
+    POST /render with a wheel spec as JSON body returns the drawio XML of one structure.
+    Query parameters: structure=NAME (default: the first structure), engine=objects|columnar.
+    GET /health answers 'ok'.
+    """
+    server_version = "WheelRenderServer/1.0"
+
+    def do_GET(self):
+        if urlparse(self.path).path == '/health':
+            self._send(200, b'ok', 'text/plain')
+        else:
+            self._send(404, b'Not found', 'text/plain')
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/render':
+            self._send(404, b'Not found', 'text/plain')
+            return
+
+        start_time = time.perf_counter()
+        query = parse_qs(url.query)
+        structure_name = query.get('structure', [None])[0]
+        engine = query.get('engine', ['objects'])[0]
+        try:
+            content_length = int(self.headers.get('Content-Length') or 0)
+            if content_length < 0:
+                raise ValueError(f"Invalid Content-Length {content_length}")
+            json_data = json.loads(self.rfile.read(content_length))
+            xml_content = self.server.render_service.render(json_data, structure_name, engine)
+        except (ValueError, KeyError, TypeError) as e:
+            # Invalid JSON, unknown structure or wheel type, invalid configuration...
+            self._send(400, f"Invalid render request: {e}".encode('utf-8'), 'text/plain')
+            return
+        except Exception as e:
+            logger.error(f"Failed to render {structure_name}: {e}", exc_info=True)
+            self._send(500, b'Render failed', 'text/plain')
+            return
+
+        self._send(200, xml_content, 'application/xml')
+        logger.info(f"Rendered {structure_name or '(first structure)'} in {time.perf_counter() - start_time:.3f}s")
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', f"{content_type}; charset=utf-8")
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Unix socket clients have no (host, port) address
+        return self.client_address[0] if isinstance(self.client_address, tuple) and self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+class RenderHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, server_address, render_service, backlog=DEFAULT_BACKLOG):
+        self.render_service = render_service
+        self.request_queue_size = backlog
+        super().__init__(server_address, RenderRequestHandler)
+
+
+class UnixRenderHTTPServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, render_service, backlog=DEFAULT_BACKLOG):
+        self.render_service = render_service
+        self.request_queue_size = backlog
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        super().__init__(socket_path, RenderRequestHandler)
+
+
+class RenderMetrics:
+    """
+    Request counters and the latencies of the last requests of the asyncio server.
+    """
+    LATENCY_WINDOW = 1000
+
+    def __init__(self):
+        self.counters = {'requests': 0, 'renders': 0, 'coalesced': 0, 'rejected': 0, 'errors': 0}
+        self.latencies = deque(maxlen=self.LATENCY_WINDOW)
+
+    def count(self, name):
+        self.counters[name] += 1
+
+    def record_latency(self, seconds):
+        self.latencies.append(seconds)
+
+    def snapshot(self, in_flight=0):
+        latencies = sorted(self.latencies)
+
+        def percentile(fraction):
+            return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] if latencies else None
+
+        return dict(self.counters, in_flight=in_flight, latency_seconds={
+            'p50': percentile(0.5), 'p95': percentile(0.95), 'p99': percentile(0.99),
+            'max': latencies[-1] if latencies else None, 'window': len(latencies),
+        })
+
+
+class AsyncRenderServer:
+    """
+    asyncio flavour of the render server: requests are accepted concurrently by the event loop
+    and the renders run in the RenderService executor. Identical in-flight requests (same body
+    hash, structure and engine) are coalesced into a single render whose result is shared by
+    all the waiting requests. The event loop never parses a body: it is hashed in the default
+    thread pool (hashlib releases the GIL) and parsed by the render, in the executor.
+    At most max_pending distinct renders are in flight: beyond that, new renders are rejected
+    with 503 so that clients back off instead of queuing unboundedly.
+    Same endpoints as RenderRequestHandler, plus GET /metrics.
+    """
+    DEFAULT_MAX_PENDING = 64
+    MAX_BODY_SIZE = 64 * 1024 * 1024
+
+    def __init__(self, render_service, max_pending=DEFAULT_MAX_PENDING):
+        self.render_service = render_service
+        self.max_pending = max_pending
+        self.metrics = RenderMetrics()
+        self._in_flight = {}  # (body hash, structure, engine) -> future of the render
+
+    async def render(self, body, structure_name=None, engine='objects'):
+        # Renders the raw JSON body, returns the XML bytes; raises OverflowError when the render cannot be queued
+        loop = asyncio.get_running_loop()
+        body_hash = (await loop.run_in_executor(None, hashlib.sha256, body)).hexdigest()
+        key = (body_hash, structure_name, engine)
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.metrics.count('coalesced')
+        else:
+            if len(self._in_flight) >= self.max_pending:
+                raise OverflowError(f"Too many renders in flight ({len(self._in_flight)})")
+            future = loop.run_in_executor(self.render_service.executor, _render_body,
+                                          body, structure_name, generate.DEFAULT_WHEEL_ARGS, engine)
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+            self.metrics.count('renders')
+        # A waiter that disconnects must not cancel the render shared with the others
+        return await asyncio.shield(future)
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while await self._handle_request(reader, writer):
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_request(self, reader, writer):
+        # Returns whether the connection can be kept alive for another request
+        request_line = await reader.readline()
+        if not request_line:
+            return False
+        try:
+            method, target, version = request_line.decode('latin-1').split()
+        except ValueError:
+            await self._send(writer, 400, b'Bad request line', 'text/plain', keep_alive=False)
+            return False
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+
+        try:
+            content_length = int(headers.get('content-length') or 0)
+        except ValueError:
+            content_length = -1
+        if content_length < 0:
+            await self._send(writer, 400, b'Invalid Content-Length', 'text/plain', keep_alive=False)
+            return False
+        if content_length > self.MAX_BODY_SIZE:
+            await self._send(writer, 413, b'Request body too large', 'text/plain', keep_alive=False)
+            return False
+        body = await reader.readexactly(content_length) if content_length else b''
+
+        url = urlparse(target)
+        if method == 'GET' and url.path == '/health':
+            await self._send(writer, 200, b'ok', 'text/plain', keep_alive)
+        elif method == 'GET' and url.path == '/metrics':
+            metrics = self.metrics.snapshot(in_flight=len(self._in_flight))
+            await self._send(writer, 200, json.dumps(metrics).encode('utf-8'), 'application/json', keep_alive)
+        elif method == 'POST' and url.path == '/render':
+            await self._handle_render(writer, url, body, keep_alive)
+        else:
+            await self._send(writer, 404, b'Not found', 'text/plain', keep_alive)
+        return keep_alive
+
+    async def _handle_render(self, writer, url, body, keep_alive):
+        start_time = time.perf_counter()
+        self.metrics.count('requests')
+        query = parse_qs(url.query)
+        structure_name = query.get('structure', [None])[0]
+        engine = query.get('engine', ['objects'])[0]
+        try:
+            xml_content = await self.render(body, structure_name, engine)
+        except OverflowError as e:
+            self.metrics.count('rejected')
+            await self._send(writer, 503, f"Server busy: {e}".encode('utf-8'), 'text/plain', keep_alive,
+                             extra_headers={'Retry-After': '1'})
+            return
+        except (ValueError, KeyError, TypeError) as e:
+            self.metrics.count('errors')
+            await self._send(writer, 400, f"Invalid render request: {e}".encode('utf-8'), 'text/plain', keep_alive)
+            return
+        except Exception as e:
+            self.metrics.count('errors')
+            logger.error(f"Failed to render {structure_name}: {e}", exc_info=True)
+            await self._send(writer, 500, b'Render failed', 'text/plain', keep_alive)
+            return
+
+        await self._send(writer, 200, xml_content, 'application/xml', keep_alive)
+        elapsed = time.perf_counter() - start_time
+        self.metrics.record_latency(elapsed)
+        logger.info(f"Rendered {structure_name or '(first structure)'} in {elapsed:.3f}s")
+
+    @staticmethod
+    async def _send(writer, status, body, content_type, keep_alive, extra_headers=None):
+        headers = {
+            'Content-Type': f"{content_type}; charset=utf-8",
+            'Content-Length': str(len(body)),
+            'Connection': 'keep-alive' if keep_alive else 'close',
+        }
+        headers.update(extra_headers or {})
+        head = f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+        head += ''.join(f"{name}: {value}\r\n" for name, value in headers.items()) + "\r\n"
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def serve(self, host='127.0.0.1', port=8080, unix_socket=None, backlog=DEFAULT_BACKLOG):
+        if unix_socket:
+            if os.path.exists(unix_socket):
+                os.remove(unix_socket)
+            server = await asyncio.start_unix_server(self.handle_connection, unix_socket, backlog=backlog)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port, backlog=backlog)
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve drawio wheel renders over HTTP or a Unix socket.")
+    parser.add_argument('--host', required=False, default='127.0.0.1', help='Host to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', required=False, type=int, default=8080, help='Port to listen on (default: 8080)')
+    parser.add_argument('--unix-socket', required=False, default=None,
+                        help='Listen on this Unix socket path instead of a TCP port')
+    parser.add_argument('--jobs', required=False, type=int, default=os.cpu_count() or 1,
+                        help='Number of warm worker processes, 0 to render in the server threads (default: number of CPUs)')
+    parser.add_argument('--backlog', required=False, type=int, default=DEFAULT_BACKLOG,
+                        help=f'Maximum number of connections waiting to be accepted (default: {DEFAULT_BACKLOG})')
+    parser.add_argument('--log-level', required=False, default='INFO',
+                        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+                        help='Set the logging level (default: INFO)')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='Serve with asyncio, coalescing identical in-flight renders')
+    parser.add_argument('--max-pending', required=False, type=int, default=AsyncRenderServer.DEFAULT_MAX_PENDING,
+                        help='With --async, maximum number of distinct renders in flight before '
+                             f'answering 503 (default: {AsyncRenderServer.DEFAULT_MAX_PENDING})')
+    args = parser.parse_args()
+
+    log_level = getattr(logging, args.log_level.upper(), logging.INFO)
+    generate.logger = generate.initialize_logger(log_level)
+
+    render_service = RenderService(args.jobs, log_level)
+    if args.use_async:
+        async_server = AsyncRenderServer(render_service, args.max_pending)
+        address = f"unix socket {args.unix_socket}" if args.unix_socket else f"http://{args.host}:{args.port}"
+        logger.info(f"Serving wheel renders with asyncio on {address} (jobs={args.jobs}, max pending={args.max_pending})")
+        try:
+            asyncio.run(async_server.serve(args.host, args.port, args.unix_socket, args.backlog))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            render_service.close()
+            if args.unix_socket and os.path.exists(args.unix_socket):
+                os.remove(args.unix_socket)
+        return
+
+    if args.unix_socket:
+        server = UnixRenderHTTPServer(args.unix_socket, render_service, args.backlog)
+        logger.info(f"Serving wheel renders on unix socket {args.unix_socket} (jobs={args.jobs})")
+    else:
+        server = RenderHTTPServer((args.host, args.port), render_service, args.backlog)
+        logger.info(f"Serving wheel renders on http://{args.host}:{args.port} (jobs={args.jobs})")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        render_service.close()
+        if args.unix_socket and os.path.exists(args.unix_socket):
+            os.remove(args.unix_socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import math
+from html import escape
+
+from drawio import SpooledCellBuffer
+from text_metrics import text_width, visible_lines
+
+
+class SVGGenerator:
+    """
+    SVG backend with the cell API of DiagramGenerator: the wheel computes the same geometry
+    and calls the same add_* methods, and the shapes are drawn as SVG paths instead of
+    draw.io shapes, so no draw.io export step is needed to get an image.
+    Angles are the draw.io fractions of a turn, clockwise from the top. The view box is
+    grown to the drawn elements as they are added.
+    """
+    DEFAULT_SPOOL_SIZE = 1024 * 1024
+    FONT_FAMILY = 'Helvetica'   # draw.io's default font
+    LINE_HEIGHT = 1.2           # Line spacing of multi-line labels, in ems
+    MARGIN = 10
+
+    LINE_STYLE_DEFAULTS = {
+        "strokeColor": "#000000",
+        "strokeWidth": "1",
+    }
+
+    def __init__(self, streaming=False, spool_size=DEFAULT_SPOOL_SIZE):
+        self.streaming = streaming
+        if streaming:
+            self.shapes = SpooledCellBuffer(spool_size)
+            self.text_elements = SpooledCellBuffer(spool_size)
+            self.edges = SpooledCellBuffer(spool_size)
+        else:
+            self.shapes = []
+            self.text_elements = []
+            self.edges = []
+        self.id_counter = 2  # Same element ids as DiagramGenerator
+        self.min_x = self.min_y = math.inf
+        self.max_x = self.max_y = -math.inf
+        self._paint_attributes = {}
+
+    def _extend(self, x1, y1, x2, y2):
+        if x1 < self.min_x:
+            self.min_x = x1
+        if y1 < self.min_y:
+            self.min_y = y1
+        if x2 > self.max_x:
+            self.max_x = x2
+        if y2 > self.max_y:
+            self.max_y = y2
+
+    def _paint(self, fill_color, stroke_color, opacity):
+        # Interned fill, stroke and opacity attributes (draw.io opacities are percentages)
+        key = (fill_color, stroke_color, opacity)
+        attributes = self._paint_attributes.get(key)
+        if attributes is None:
+            attributes = self._paint_attributes[key] = (
+                f'fill="{fill_color}" stroke="{stroke_color}" opacity="{float(opacity) / 100:g}"'
+            )
+        return attributes
+
+    @staticmethod
+    def _point(center_x, center_y, radius, angle):
+        theta = math.radians(angle * 360.0 - 90.0)
+        return center_x + radius * math.cos(theta), center_y + radius * math.sin(theta)
+
+    def _add_shape(self, path, center_x, center_y, radius, fill_color, stroke_color, opacity):
+        element_id = self.id_counter
+        self.shapes.append(f'<path d="{path}" {self._paint(fill_color, stroke_color, opacity)}/>\n')
+        self._extend(center_x - radius, center_y - radius, center_x + radius, center_y + radius)
+        self.id_counter += 1
+        return element_id
+
+    @staticmethod
+    def _circle_path(center_x, center_y, radius):
+        # Two half arcs: a single arc from a point to itself draws nothing
+        return (f'M{center_x - radius:.2f},{center_y:.2f}'
+                f'A{radius:.2f},{radius:.2f} 0 1 1 {center_x + radius:.2f},{center_y:.2f}'
+                f'A{radius:.2f},{radius:.2f} 0 1 1 {center_x - radius:.2f},{center_y:.2f}Z')
+
+    def _slice_path(self, center_x, center_y, outer_radius, inner_radius, start_angle, end_angle):
+        span = (end_angle - start_angle) % 1.0
+        if span == 0:
+            # Full turn
+            path = self._circle_path(center_x, center_y, outer_radius)
+            return path + self._circle_path(center_x, center_y, inner_radius) if inner_radius > 0 else path
+        large_arc = 1 if span > 0.5 else 0
+        outer_start_x, outer_start_y = self._point(center_x, center_y, outer_radius, start_angle)
+        outer_end_x, outer_end_y = self._point(center_x, center_y, outer_radius, end_angle)
+        path = (f'M{outer_start_x:.2f},{outer_start_y:.2f}'
+                f'A{outer_radius:.2f},{outer_radius:.2f} 0 {large_arc} 1 {outer_end_x:.2f},{outer_end_y:.2f}')
+        if inner_radius <= 0:
+            return path + f'L{center_x:.2f},{center_y:.2f}Z'
+        inner_start_x, inner_start_y = self._point(center_x, center_y, inner_radius, start_angle)
+        inner_end_x, inner_end_y = self._point(center_x, center_y, inner_radius, end_angle)
+        return path + (f'L{inner_end_x:.2f},{inner_end_y:.2f}'
+                       f'A{inner_radius:.2f},{inner_radius:.2f} 0 {large_arc} 0 {inner_start_x:.2f},{inner_start_y:.2f}Z')
+
+    def add_pie_slice(self, center_x, center_y, radius, start_angle, end_angle, fill_color, stroke_color, opacity):
+        path = self._slice_path(center_x, center_y, radius, 0, start_angle, end_angle)
+        return self._add_shape(path, center_x, center_y, radius, fill_color, stroke_color, opacity)
+
+    def add_annulus_slice(self, center_x, center_y, outer_radius, arc_width, start_angle, end_angle, fill_color, stroke_color, opacity):
+        # arc_width: thickness of the slice as a fraction of its outer radius, like partConcEllipse
+        inner_radius = outer_radius * (1 - arc_width)
+        path = self._slice_path(center_x, center_y, outer_radius, inner_radius, start_angle, end_angle)
+        return self._add_shape(path, center_x, center_y, outer_radius, fill_color, stroke_color, opacity)
+
+    def add_circle(self, center_x, center_y, radius, fill_color, stroke_color, opacity):
+        return self._add_shape(self._circle_path(center_x, center_y, radius),
+                               center_x, center_y, radius, fill_color, stroke_color, opacity)
+
+    def add_annulus(self, center_x, center_y, outer_radius, inner_radius, fill_color, stroke_color, opacity):
+        # Two circles, the inner one cut out by the even-odd fill rule
+        path = self._circle_path(center_x, center_y, outer_radius) + self._circle_path(center_x, center_y, inner_radius)
+        element_id = self.id_counter
+        self.shapes.append(f'<path d="{path}" fill-rule="evenodd" {self._paint(fill_color, stroke_color, opacity)}/>\n')
+        self._extend(center_x - outer_radius, center_y - outer_radius, center_x + outer_radius, center_y + outer_radius)
+        self.id_counter += 1
+        return element_id
+
+    def add_text_element(self, text, x, y, width, height, rotation, font_size, font_color, opacity):
+        # Labels are XML-escaped HTML (see text_metrics.visible_lines): SVG gets their text lines,
+        # centered on the text box and rotated around its center like the draw.io text cells
+        element_id = self.id_counter
+        lines = visible_lines(str(text))
+        center_x = x + width / 2
+        center_y = y + height / 2
+        transform = f' transform="rotate({rotation:g} {center_x:.2f} {center_y:.2f})"' if rotation else ''
+        if len(lines) == 1:
+            content = escape(lines[0], quote=False)
+        else:
+            first_dy = -(len(lines) - 1) / 2 * self.LINE_HEIGHT
+            content = ''.join(
+                f'<tspan x="{center_x:.2f}" dy="{first_dy if index == 0 else self.LINE_HEIGHT:g}em">{escape(line, quote=False)}</tspan>'
+                for index, line in enumerate(lines)
+            )
+        self.text_elements.append(
+            f'<text x="{center_x:.2f}" y="{center_y:.2f}" font-size="{font_size}" fill="{font_color}" '
+            f'opacity="{float(opacity) / 100:g}"{transform}>{content}</text>\n'
+        )
+
+        # Extent of the rotated text, whichever is larger of the text box and the estimated text
+        text_extent = max(width, max(map(text_width, lines)) * float(font_size))
+        text_height = max(height, len(lines) * self.LINE_HEIGHT * float(font_size))
+        theta = math.radians(rotation)
+        half_x = (text_extent * abs(math.cos(theta)) + text_height * abs(math.sin(theta))) / 2
+        half_y = (text_extent * abs(math.sin(theta)) + text_height * abs(math.cos(theta))) / 2
+        self._extend(center_x - half_x, center_y - half_y, center_x + half_x, center_y + half_y)
+        self.id_counter += 1
+        return element_id
+
+    def add_line(self, source_id, target_id, x1, y1, x2, y2, style_dict=None):
+        # The end points are those of the draw.io edge; the connection style keys do not apply
+        style = {**SVGGenerator.LINE_STYLE_DEFAULTS, **(style_dict or {})}
+        element_id = self.id_counter
+        self.edges.append(
+            f'<line x1="{x1:.2f}" y1="{y1:.2f}" x2="{x2:.2f}" y2="{y2:.2f}" '
+            f'stroke="{style["strokeColor"]}" stroke-width="{style["strokeWidth"]}"/>\n'
+        )
+        self._extend(min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+        self.id_counter += 1
+        return element_id
+
+    def iter_xml(self, name, compressed=False):
+        # Yield the SVG document in chunks, in the z-order of the draw.io output
+        if compressed:
+            raise ValueError("Compressed payloads are a draw.io format, SVG output can only be gzip-compressed")
+        if self.min_x > self.max_x:
+            min_x = min_y = width = height = 0
+        else:
+            min_x, min_y = self.min_x - self.MARGIN, self.min_y - self.MARGIN
+            width, height = self.max_x - self.min_x + 2 * self.MARGIN, self.max_y - self.min_y + 2 * self.MARGIN
+        yield (f'<?xml version="1.0" encoding="UTF-8"?>\n'
+               f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:.2f}" height="{height:.2f}" '
+               f'viewBox="{min_x:.2f} {min_y:.2f} {width:.2f} {height:.2f}">\n'
+               f'<title>Generic Wheel - {escape(name)}</title>\n'
+               f'<g stroke-linejoin="round">\n')
+        yield from self.shapes
+        yield (f'</g>\n<g font-family="{self.FONT_FAMILY}" text-anchor="middle" dominant-baseline="central">\n')
+        yield from self.text_elements
+        yield '</g>\n<g>\n'
+        yield from self.edges
+        yield '</g>\n</svg>\n'
+
+    def generate_xml(self, name, compressed=False):
+        return ''.join(self.iter_xml(name, compressed))
+
+    def write_xml(self, name, file, compressed=False):
+        for chunk in self.iter_xml(name, compressed):
+            file.write(chunk)
+
+    def close(self):
+        if self.streaming:
+            for buffer in (self.shapes, self.text_elements, self.edges):
+                buffer.close()
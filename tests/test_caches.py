@@ -0,0 +1,155 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+from generate import create_wheel, generate_file
+from render_cache import RenderCache, XMLRenderCache
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'examples')
+
+
+def load_example(filename):
+    with open(os.path.join(EXAMPLES_DIR, filename), encoding='utf-8') as json_file:
+        return json.load(json_file)
+
+
+class RenderCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.cache = RenderCache(os.path.join(self.temp_dir, 'cache'))
+        self.output_filename = os.path.join(self.temp_dir, 'output.drawio')
+        with open(self.output_filename, 'w', encoding='utf-8') as output_file:
+            output_file.write('<mxfile/>')
+
+    def test_make_key_ignores_key_order(self):
+        self.assertEqual(RenderCache.make_key({'a': 1, 'b': [1, 2]}, 'none'),
+                         RenderCache.make_key({'b': [1, 2], 'a': 1}, 'none'))
+        self.assertNotEqual(RenderCache.make_key({'a': 1}, 'none'), RenderCache.make_key({'a': 2}, 'none'))
+
+    def test_miss_then_hit(self):
+        key = RenderCache.make_key('structure')
+        self.assertFalse(self.cache.is_fresh(key, self.output_filename))
+        self.cache.record(key, self.output_filename)
+        self.assertTrue(self.cache.is_fresh(key, self.output_filename))
+        self.assertFalse(self.cache.is_fresh(RenderCache.make_key('other structure'), self.output_filename))
+
+    def test_changed_or_missing_output_is_a_miss(self):
+        key = RenderCache.make_key('structure')
+        self.cache.record(key, self.output_filename)
+        with open(self.output_filename, 'a', encoding='utf-8') as output_file:
+            output_file.write('edited')
+        self.assertFalse(self.cache.is_fresh(key, self.output_filename))
+
+        self.cache.record(key, self.output_filename)
+        os.remove(self.output_filename)
+        self.assertFalse(self.cache.is_fresh(key, self.output_filename))
+
+    def test_evict_least_recently_used_by_size(self):
+        keys = [RenderCache.make_key(index) for index in range(5)]
+        for index, key in enumerate(keys):
+            self.cache.record(key, self.output_filename)
+            os.utime(self.cache._entry_path(key), ns=(index * 10**9, index * 10**9))
+        self.cache.is_fresh(keys[0], self.output_filename)  # Most recently used now
+
+        entry_size = RenderCache._disk_size(os.stat(self.cache._entry_path(keys[0])))
+        self.cache.max_bytes = 2 * entry_size
+        self.assertEqual(self.cache.evict(), 3)
+        remaining = sorted(name[:-len('.json')] for name in os.listdir(self.cache.cache_dir))
+        self.assertEqual(remaining, sorted([keys[0], keys[4]]))
+        self.assertEqual(self.cache.evict(), 0)
+
+    def test_generate_file_skips_unchanged_structures(self):
+        input_filepath = os.path.join(self.temp_dir, 'feelings_wheel.json')
+        json_data = load_example('feelings_wheel.json')
+        with open(input_filepath, 'w', encoding='utf-8') as json_file:
+            json.dump(json_data, json_file)
+
+        def skipped_structures():
+            results = generate_file(input_filepath, self.temp_dir, log_level=logging.WARNING, cache=self.cache)
+            return {entry_name: skipped for entry_name, _, _, _, skipped in results}
+
+        self.assertFalse(any(skipped_structures().values()))
+        self.assertTrue(all(skipped_structures().values()))
+
+        json_data['structures'][1]['nodes'][0]['label'] = 'Changed'
+        with open(input_filepath, 'w', encoding='utf-8') as json_file:
+            json.dump(json_data, json_file)
+        changed_name = json_data['structures'][1]['name']
+        self.assertEqual([name for name, skipped in skipped_structures().items() if not skipped], [changed_name])
+
+
+class XMLRenderCacheTest(unittest.TestCase):
+
+    def test_lru_bounded_by_bytes(self):
+        cache = XMLRenderCache(max_bytes=10)
+        cache.put('a', 'aaaa')
+        cache.put('b', 'bbbb')
+        self.assertEqual(cache.get('a'), 'aaaa')  # 'b' is the least recently used now
+        cache.put('c', 'cccc')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 'aaaa')
+        self.assertEqual(cache.get('c'), 'cccc')
+        self.assertEqual(cache.total_bytes, 8)
+
+    def test_oversized_and_disabled(self):
+        cache = XMLRenderCache(max_bytes=3)
+        cache.put('a', 'aaaa')
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.total_bytes, 0)
+
+        disabled = XMLRenderCache(max_bytes=0)
+        disabled.put('a', 'a')
+        self.assertEqual(len(disabled), 0)
+
+    def test_utf8_size_and_discard(self):
+        cache = XMLRenderCache(max_bytes=100)
+        cache.put(('x', 1), 'é')
+        cache.put(('y', 1), 'y')
+        self.assertEqual(cache.total_bytes, 3)
+        cache.discard(lambda key: key[0] == 'x')
+        self.assertIsNone(cache.get(('x', 1)))
+        self.assertEqual(cache.total_bytes, 1)
+
+
+class WheelXMLCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.json_data = load_example('feelings_wheel.json')
+        self.wheel = create_wheel(self.json_data, xml_cache_bytes=16 * 1024 * 1024)
+
+    def test_disabled_by_default(self):
+        wheel = create_wheel(self.json_data)
+        wheel.json_to_drawio('German')
+        self.assertEqual(len(wheel.xml_cache), 0)
+
+    def test_hit(self):
+        xml_content = self.wheel.json_to_drawio('German')
+        self.assertIs(self.wheel.json_to_drawio('German'), xml_content)
+        self.assertIsNot(self.wheel.json_to_drawio('German', compressed=True), xml_content)
+
+    def test_replace_structure_invalidates(self):
+        xml_content = self.wheel.json_to_drawio('German')
+        structure = json.loads(json.dumps(self.wheel.structure_index['German']))
+        structure['nodes'][0]['label'] = 'Replaced'
+        self.wheel.replace_structure(structure)
+        replaced_xml = self.wheel.json_to_drawio('German')
+        self.assertNotEqual(replaced_xml, xml_content)
+        self.assertIn('Replaced', replaced_xml)
+        self.assertIs(self.wheel.json_to_drawio('German'), replaced_xml)
+
+    def test_structures_edited_in_place_are_not_cached(self):
+        self.wheel.json_to_drawio('German')
+        structure = self.wheel.get_structure('German')
+        structure['levels'][0].nodes[0].label = 'Edited'
+        self.assertIn('Edited', self.wheel.json_to_drawio('German'))
+        structure['levels'][0].nodes[0].label = 'Edited again'
+        self.assertIn('Edited again', self.wheel.json_to_drawio('German'))
+
+
+if __name__ == '__main__':
+    unittest.main()
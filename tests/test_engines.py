@@ -0,0 +1,85 @@
+import glob
+import json
+import os
+import random
+import unittest
+
+from generate import render_all_xml
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'examples')
+
+
+def load_example(filename):
+    with open(os.path.join(EXAMPLES_DIR, filename), encoding='utf-8') as json_file:
+        return json.load(json_file)
+
+
+def random_nodes(rng, wheel_type, depth, max_children=4):
+    # Random sub-tree exercising the angle rules: weights (0 included) or percentages
+    # (some unspecified, some 0, siblings adding up to at most 100%)
+    nodes = []
+    remaining_percentage = 100
+    for index in range(rng.randint(1, max_children)):
+        node = {'label': f"Node {depth}.{index}"}
+        if wheel_type == 'flavor_wheel':
+            if rng.random() < 0.3:
+                node['weight'] = rng.choice([0, 0.5, 1, 2, 3])
+        elif rng.random() < 0.6:
+            percentage = rng.choice([0, 10, 25, 50, 100])
+            if percentage <= remaining_percentage:
+                node['percentage'] = percentage
+                remaining_percentage -= percentage
+        if depth > 1 and rng.random() < 0.7:
+            node['sub_nodes'] = random_nodes(rng, wheel_type, depth - 1, max_children)
+        nodes.append(node)
+    return nodes
+
+
+def random_spec(rng, wheel_type):
+    return {
+        'type': wheel_type,
+        'levels_config': [{'levels': 1, 'outer_radius': 150}, {'levels': {'from': 2}, 'outer_radius_increment': 80}],
+        'structures': [{'name': f"Structure {index}", 'nodes': random_nodes(rng, wheel_type, depth=4)}
+                       for index in range(3)],
+    }
+
+
+class EngineParityTest(unittest.TestCase):
+    """The 'objects' and 'columnar' engines render the same XML."""
+
+    def assert_same_render(self, json_data):
+        objects_xml = render_all_xml(json_data, engine='objects')
+        columnar_xml = render_all_xml(json_data, engine='columnar')
+        self.assertEqual(list(objects_xml), list(columnar_xml))
+        for name in objects_xml:
+            self.assertEqual(objects_xml[name], columnar_xml[name], f"Different renders for '{name}'")
+
+    def test_examples(self):
+        example_files = sorted(glob.glob(os.path.join(EXAMPLES_DIR, '*.json')))
+        self.assertTrue(example_files)
+        for filepath in example_files:
+            with self.subTest(example=os.path.basename(filepath)):
+                self.assert_same_render(load_example(os.path.basename(filepath)))
+
+    def test_random_specs(self):
+        rng = random.Random(1234)
+        for seed_index in range(40):
+            wheel_type = 'flavor_wheel' if seed_index % 2 else 'percentage_wheel'
+            json_data = random_spec(rng, wheel_type)
+            with self.subTest(spec=seed_index, wheel_type=wheel_type):
+                self.assert_same_render(json_data)
+
+    def test_same_errors(self):
+        over_100 = {'type': 'percentage_wheel', 'structures': [
+            {'name': 'Over', 'nodes': [{'label': 'A', 'percentage': 60}, {'label': 'B', 'percentage': 50}]}]}
+        negative_weight = {'type': 'flavor_wheel', 'structures': [
+            {'name': 'Negative', 'nodes': [{'label': 'A', 'weight': -1}]}]}
+        for json_data in (over_100, negative_weight):
+            for engine in ('objects', 'columnar'):
+                with self.subTest(structure=json_data['structures'][0]['name'], engine=engine):
+                    with self.assertRaises(ValueError):
+                        render_all_xml(json_data, engine=engine)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+from generate import COMPILED_EXTENSION, compile_spec, generate_file
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'examples')
+EXAMPLE_FILES = ['feelings_wheel.json', 'renewable_energy.json', 'solar_system_planets_composition.json']
+
+
+def read_outputs(output_folder):
+    outputs = {}
+    for filename in sorted(os.listdir(output_folder)):
+        with open(os.path.join(output_folder, filename), 'rb') as output_file:
+            outputs[filename] = output_file.read()
+    return outputs
+
+
+class IngestionRoundTripTest(unittest.TestCase):
+    """Streamed, memory-mapped and compiled inputs write the same files as a normal render."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+
+    def render(self, input_filepath, work_dir, label, **options):
+        output_folder = os.path.join(work_dir, label)
+        os.makedirs(output_folder)
+        results = generate_file(input_filepath, output_folder, log_level=logging.WARNING, **options)
+        self.assertTrue(results)
+        for entry_name, _, _, error, _ in results:
+            self.assertIsNone(error, f"{entry_name} failed: {error}")
+        return read_outputs(output_folder)
+
+    def assert_round_trip(self, input_filepath, **options):
+        work_dir = tempfile.mkdtemp(dir=self.temp_dir)
+        expected = self.render(input_filepath, work_dir, 'normal', **options)
+        self.assertTrue(expected)
+        self.assertEqual(self.render(input_filepath, work_dir, 'stream_json', stream_json=True, **options), expected)
+        self.assertEqual(self.render(input_filepath, work_dir, 'mmap', use_mmap=True, **options), expected)
+
+        # The compiled file is named after the spec, so it writes the same output filenames
+        compiled_folder = os.path.join(work_dir, 'compiled_spec')
+        os.makedirs(compiled_folder)
+        stem = os.path.splitext(os.path.basename(input_filepath))[0]
+        compiled_filepath = os.path.join(compiled_folder, f"{stem}{COMPILED_EXTENSION}")
+        compile_spec(input_filepath, compiled_filepath)
+        self.assertEqual(self.render(compiled_filepath, work_dir, 'compiled', **options), expected)
+
+    def test_examples(self):
+        for filename in EXAMPLE_FILES:
+            with self.subTest(example=filename):
+                self.assert_round_trip(os.path.join(EXAMPLES_DIR, filename))
+
+    def test_columnar_engine(self):
+        self.assert_round_trip(os.path.join(EXAMPLES_DIR, 'feelings_wheel.json'), wheel_options={'engine': 'columnar'})
+
+    def test_compressed_outputs(self):
+        self.assert_round_trip(os.path.join(EXAMPLES_DIR, 'feelings_wheel.json'), compression='gzip')
+
+    def test_header_after_structures(self):
+        # levels_config after the structures: the streamed input is read in two passes
+        with open(os.path.join(EXAMPLES_DIR, 'renewable_energy.json'), encoding='utf-8') as json_file:
+            json_data = json.load(json_file)
+        reordered = {'structures': json_data['structures'], 'type': json_data['type'],
+                     'levels_config': json_data['levels_config']}
+        input_filepath = os.path.join(self.temp_dir, 'reordered.json')
+        with open(input_filepath, 'w', encoding='utf-8') as json_file:
+            json.dump(reordered, json_file)
+        self.assert_round_trip(input_filepath)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import asyncio
+import http.client
+import json
+import os
+import threading
+import unittest
+
+from generate import render_xml
+from server import AsyncRenderServer, RenderHTTPServer, RenderService
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'examples')
+
+
+def example_body():
+    with open(os.path.join(EXAMPLES_DIR, 'feelings_wheel.json'), 'rb') as json_file:
+        return json_file.read()
+
+
+class AsyncRenderServerTest(unittest.TestCase):
+    """Requests sent raw over a socket, so that malformed headers can be tested too."""
+
+    def request(self, raw_request, max_pending=AsyncRenderServer.DEFAULT_MAX_PENDING):
+        # Returns (status, headers, body) of the response to raw_request
+        async def exchange():
+            render_server = AsyncRenderServer(RenderService(jobs=0), max_pending=max_pending)
+            server = await asyncio.start_server(render_server.handle_connection, '127.0.0.1', 0)
+            async with server:
+                reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+                writer.write(raw_request)
+                await writer.drain()
+                response = await reader.read()
+                writer.close()
+            return response
+
+        response = asyncio.run(exchange())
+        head, _, body = response.partition(b'\r\n\r\n')
+        status_line, *header_lines = head.decode('latin-1').split('\r\n')
+        headers = {name.lower(): value.strip() for name, _, value in (line.partition(':') for line in header_lines)}
+        return int(status_line.split()[1]), headers, body
+
+    @staticmethod
+    def render_request(body, query='structure=German', content_length=None):
+        content_length = len(body) if content_length is None else content_length
+        return (f"POST /render?{query} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n"
+                f"Content-Length: {content_length}\r\n\r\n").encode('latin-1') + body
+
+    def test_render(self):
+        body = example_body()
+        status, _, xml_content = self.request(self.render_request(body))
+        self.assertEqual(status, 200)
+        self.assertEqual(xml_content, render_xml(json.loads(body), 'German'))
+
+    def test_invalid_content_length(self):
+        for content_length in ('abc', '-1'):
+            with self.subTest(content_length=content_length):
+                status, _, _ = self.request(self.render_request(b'{}', content_length=content_length))
+                self.assertEqual(status, 400)
+
+    def test_invalid_requests(self):
+        for body, query in ((b'{"type": ', 'structure=German'), (example_body(), 'structure=Unknown'),
+                            (b'{"type": "pie", "structures": []}', '')):
+            with self.subTest(body=body[:20], query=query):
+                status, _, _ = self.request(self.render_request(body, query))
+                self.assertEqual(status, 400)
+
+    def test_busy(self):
+        status, headers, _ = self.request(self.render_request(example_body()), max_pending=0)
+        self.assertEqual(status, 503)
+        self.assertIn('retry-after', headers)
+
+
+class RenderHTTPServerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = RenderHTTPServer(('127.0.0.1', 0), RenderService(jobs=0))
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def post(self, body, query='structure=German', headers=None):
+        connection = http.client.HTTPConnection(*self.server.server_address[:2], timeout=30)
+        try:
+            connection.request('POST', f"/render?{query}", body=body, headers=headers or {})
+            response = connection.getresponse()
+            return response.status, response.read()
+        finally:
+            connection.close()
+
+    def test_render(self):
+        body = example_body()
+        status, xml_content = self.post(body)
+        self.assertEqual(status, 200)
+        self.assertEqual(xml_content, render_xml(json.loads(body), 'German'))
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.post(b'{"type": ')[0], 400)
+        self.assertEqual(self.post(example_body(), 'structure=Unknown')[0], 400)
+        self.assertEqual(self.post(b'{}', headers={'Content-Length': '-1'})[0], 400)
+        self.assertEqual(self.post(b'{}', headers={'Content-Length': 'abc'})[0], 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import html
+import re
+import unicodedata
+from bisect import bisect_right
+from itertools import accumulate
+
+# Advance widths of the printable ASCII characters in Helvetica (draw.io's default font), in
+# thousandths of an em, from ' ' (32) to '~' (126)
+_ASCII_WIDTHS = (
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+)
+CHAR_WIDTHS = {chr(32 + offset): width / 1000 for offset, width in enumerate(_ASCII_WIDTHS)}
+DEFAULT_CHAR_WIDTH = 0.556  # Width of a digit, for the characters without a better estimate
+WIDE_CHAR_WIDTH = 1.0       # East Asian wide and full-width characters
+
+
+def char_width(char):
+    """
+    Estimated width of a character in ems. Characters outside the table are estimated once
+    (accented letters as their base letter, wide characters as one em) and added to it.
+    """
+    width = CHAR_WIDTHS.get(char)
+    if width is None:
+        if unicodedata.east_asian_width(char) in ('W', 'F'):
+            width = WIDE_CHAR_WIDTH
+        else:
+            base_char = unicodedata.normalize('NFD', char)[0]
+            width = CHAR_WIDTHS.get(base_char, DEFAULT_CHAR_WIDTH)
+        CHAR_WIDTHS[char] = width
+    return width
+
+
+def _char_widths(text):
+    try:
+        return list(map(CHAR_WIDTHS.__getitem__, text))  # Fast path: every character is in the table
+    except KeyError:
+        return list(map(char_width, text))
+
+
+def text_width(text):
+    # Estimated width of a line of text in ems
+    return sum(_char_widths(text))
+
+
+_LINE_BREAK = re.compile(r'<br\s*/?>', re.IGNORECASE)
+_TAG = re.compile(r'<[^>]*>')
+
+
+def visible_lines(label):
+    """
+    Lines of text shown for a label. Labels are XML-escaped HTML (the cells are html=1): the
+    markup is removed, <br> tags split the lines and the entities are decoded.
+    """
+    if '&' not in label and '<' not in label:
+        return [label]
+    text = html.unescape(label)  # XML escaping: the HTML of the label
+    return [html.unescape(_TAG.sub('', line)) for line in _LINE_BREAK.split(text)]
+
+
+class LabelFitter:
+    """
+    Fit labels in the space available to them: a label longer than the space (or a font
+    taller than it) gets a smaller font size, down to min_font_size, and plain labels are
+    truncated with an ellipsis beyond that (labels with markup only shrink, cutting them
+    could break the markup). Label widths are estimated from the per-character width table,
+    and memoized per label in ems (the width at any font size is a multiplication), so
+    fitting the nodes of a wheel costs one dictionary lookup per label.
+    """
+    MIN_FONT_SIZE = 6         # Smallest font size of the default level configs
+    LINE_HEIGHT = 1.2         # Height of a line of text, in ems
+    PADDING = 4               # Margin kept along the text, in pixels
+    ELLIPSIS = '…'
+    MAX_CACHED_LABELS = 1 << 17
+
+    def __init__(self, min_font_size=MIN_FONT_SIZE, line_height=LINE_HEIGHT, padding=PADDING):
+        self.min_font_size = min_font_size
+        self.line_height = line_height
+        self.padding = padding
+        self._label_metrics = {}  # label -> (width of its longest line in ems, line count)
+
+    def label_metrics(self, label):
+        metrics = self._label_metrics.get(label)
+        if metrics is None:
+            if len(self._label_metrics) >= LabelFitter.MAX_CACHED_LABELS:
+                self._label_metrics.clear()  # Keep the memory bounded on very large wheels
+            lines = visible_lines(str(label))  # Numeric labels are drawn as their text
+            metrics = self._label_metrics[label] = (max(map(text_width, lines)), len(lines))
+        return metrics
+
+    def label_width(self, label, font_size=1):
+        return self.label_metrics(label)[0] * font_size
+
+    def fit(self, label, font_size, length, thickness):
+        """
+        Returns (label, font_size) fitting a text of `length` x `thickness` pixels (along and
+        across the text). Labels that fit are returned unchanged.
+        """
+        label = str(label)
+        length -= self.padding
+        label_width, line_count = self.label_metrics(label)
+        line_height = self.line_height * line_count
+        if label_width * font_size <= length and font_size * line_height <= thickness:
+            return label, font_size
+
+        fitted_size = int(min(font_size, thickness / line_height,
+                              length / label_width if label_width else font_size))
+        if fitted_size >= self.min_font_size:
+            return label, fitted_size
+
+        # Even the smallest font is too big: truncate the label at the smallest font
+        font_size = min(font_size, self.min_font_size)
+        if label_width * font_size <= length or line_count > 1 or label != visible_lines(label)[0]:
+            return label, font_size  # Too thin for the font, or markup: nothing to cut
+        # Longest prefix that fits with the ellipsis
+        end = bisect_right(list(accumulate(_char_widths(label))), length / font_size - char_width(self.ELLIPSIS))
+        return label[:end].rstrip() + self.ELLIPSIS, font_size
@@ -0,0 +1,115 @@
+import re
+
+from drawio import DiagramGenerator
+from render_cache import RenderCache
+
+# Label slots of a skeleton: the labels are rendered as these markers, then cut out of the XML
+_SLOT_MARKER = '\x00'
+_SLOT = re.compile(f'{_SLOT_MARKER}(\\d+){_SLOT_MARKER}')
+
+
+def split_labels(structure):
+    """
+    Split a JSON structure into its topology key and its labels. The key hashes the nodes
+    without their labels (tree shape, percentages and styles): structures with the same key,
+    like the translations of a wheel, render to the same cells except for the label texts.
+    Labels are listed in depth-first order. Returns None for the structures that cannot be
+    rendered from slots (a node without a label, or a label containing the slot marker).
+    """
+    labels = []
+
+    def strip(nodes_data):
+        stripped_nodes = []
+        for node_data in nodes_data:
+            label = node_data.get('label')
+            if label is None or _SLOT_MARKER in str(label):
+                raise ValueError(label)
+            labels.append(label)
+            stripped_nodes.append({key: strip(value) if key == 'sub_nodes' else value
+                                   for key, value in node_data.items() if key != 'label'})
+        return stripped_nodes
+
+    try:
+        nodes = strip(structure.get('nodes', []))
+    except ValueError:
+        return None
+    return RenderCache.make_key(nodes), labels
+
+
+def slotted_structure(structure):
+    # Copy of a JSON structure whose labels are replaced by slot markers, in the order of split_labels
+    slot_count = 0
+
+    def replace(nodes_data):
+        nonlocal slot_count
+        slotted_nodes = []
+        for node_data in nodes_data:
+            slotted_node = {**node_data, 'label': f'{_SLOT_MARKER}{slot_count}{_SLOT_MARKER}'}
+            slot_count += 1
+            if 'sub_nodes' in node_data:
+                slotted_node['sub_nodes'] = replace(node_data['sub_nodes'])
+            slotted_nodes.append(slotted_node)
+        return slotted_nodes
+
+    return {**structure, 'nodes': replace(structure.get('nodes', []))}
+
+
+class Skeleton:
+    """
+    Graph model XML of a topology rendered with slotted labels, pre-split at the slots:
+    filling it with the labels of a structure gives the XML a full render of that structure
+    would give, for the cost of a join per batch of labels.
+    level_counts: (level_number, nodes, cells) of each level of the topology, for the profiler.
+    """
+    def __init__(self, graph_model_chunks, level_counts=()):
+        # The graph model is split chunk by chunk (as read back from a spooled diagram), a
+        # slot cut between two chunks is completed by the next one
+        self.fragments = []
+        self.slots = []
+        self.size = 0
+        self.level_counts = tuple(level_counts)
+        fragment_parts = []
+        pending = ''
+        for chunk in graph_model_chunks:
+            self.size += len(chunk.encode('utf-8'))
+            text = pending + chunk
+            if text.count(_SLOT_MARKER) % 2:
+                cut = text.rindex(_SLOT_MARKER)
+                text, pending = text[:cut], text[cut:]
+            else:
+                pending = ''
+            parts = _SLOT.split(text)
+            fragment_parts.append(parts[0])
+            for index in range(1, len(parts), 2):
+                self.fragments.append(''.join(fragment_parts))
+                self.slots.append(int(parts[index]))
+                fragment_parts = [parts[index + 1]]
+        fragment_parts.append(pending)
+        self.fragments.append(''.join(fragment_parts))
+
+    def iter_fill(self, labels, batch_slots=4096):
+        # The filled graph model in chunks of batch_slots label slots (a fragment precedes each slot)
+        fragments = self.fragments
+        slots = self.slots
+        for start in range(0, len(slots), batch_slots):
+            parts = []
+            for fragment, slot in zip(fragments[start:start + batch_slots], slots[start:start + batch_slots]):
+                parts.append(fragment)
+                parts.append(str(labels[slot]))
+            yield ''.join(parts)
+        yield fragments[-1]
+
+
+class FilledDiagram(DiagramGenerator):
+    """
+    Diagram of a structure filled from a skeleton, written like a rendered diagram. The
+    filled graph model is kept in the shapes buffer (spooled when streaming): the skeleton
+    already holds the cells in z-order.
+    """
+    def __init__(self, skeleton, labels, streaming=False, spool_size=DiagramGenerator.DEFAULT_SPOOL_SIZE):
+        super().__init__(streaming, spool_size)
+        for chunk in skeleton.iter_fill(labels):
+            self.shapes.append(chunk)
+
+    def iter_graph_model(self):
+        yield from self.shapes